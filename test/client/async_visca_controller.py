@@ -0,0 +1,312 @@
+"""
+Async VISCA Controller - Controller VISCA-over-IP nativo asyncio
+Stessa interfaccia pubblica di ViscaController, ma con comandi awaitable:
+un solo event loop può pilotare decine di telecamere senza un thread
+per ogni risposta in attesa.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Set
+
+from config import VISCA_PORT, CLIENT_BIND_IP
+from visca_controller import (
+    ViscaControllerBase, PendingRequest, CommandSockets, CompiledCommand, STATUS_INQUIRY,
+    compile_command, build_visca_ip_packet
+)
+
+# Risultato interno: comando rifiutato per socket (0x05) o buffer (0x03) pieni
+_REJECTED = object()
+
+
+class _ViscaDatagramProtocol(asyncio.DatagramProtocol):
+    """Protocollo UDP: inoltra ogni datagramma al controller"""
+
+    def __init__(self, controller: 'AsyncViscaController'):
+        self.controller = controller
+
+    def datagram_received(self, data: bytes, addr):
+        self.controller._on_datagram(data)
+
+    def error_received(self, exc: Exception):
+        # Es. ICMP port unreachable se il simulatore non è avviato
+        print(f"[VISCA ASYNC] Errore socket: {exc}")
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.controller._transport = None
+
+
+class AsyncViscaController(ViscaControllerBase):
+    """
+    Gestisce la comunicazione VISCA con il server telecamere tramite asyncio
+
+    Come ViscaController un comando occupa uno dei due socket comandi della
+    telecamera dall'invio al Completion: senza posti liberi send() attende
+    invece di provocare l'errore 0x05, e un comando rifiutato (0x03/0x05) è
+    ripetuto dopo RETRY_DELAY. Non c'è coalescenza dei movimenti
+    (OutboundQueue): ogni chiamante attende il proprio comando.
+    """
+
+    COMMAND_SOCKETS = 2
+
+    def __init__(self, ip: str):
+        """
+        Crea il controller (senza I/O): usare `await start()` o `create()`
+
+        Args:
+            ip: Indirizzo IP del server
+        """
+        super().__init__()
+        self.server_ip = ip
+        self.sequence = 1
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._schedule_event: Optional[asyncio.Event] = None
+        # Posti nei socket comandi per telecamera; l'evento segnala un posto liberato
+        self._command_sockets = {
+            cam_id: CommandSockets(self.COMMAND_SOCKETS) for cam_id in self.camera_states
+        }
+        self._socket_events: Dict[int, asyncio.Event] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    @classmethod
+    async def create(cls, ip: str) -> 'AsyncViscaController':
+        """Crea e avvia il controller nell'event loop corrente"""
+        controller = cls(ip)
+        await controller.start()
+        return controller
+
+    async def start(self):
+        """Apre l'endpoint UDP e avvia lo scheduler delle inquiry"""
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._schedule_event = asyncio.Event()
+        self._socket_events = {cam_id: asyncio.Event() for cam_id in self.camera_states}
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ViscaDatagramProtocol(self),
+            local_addr=(CLIENT_BIND_IP, 0)
+        )
+        self._sync_task = loop.create_task(self._sync_loop())
+
+        print(f"[VISCA ASYNC] Controller inizializzato per server {self.server_ip}")
+        print(f"[VISCA ASYNC] Timeout risposta iniziale: {self.RESPONSE_TIMEOUT}s (adattivo)")
+
+    def _on_datagram(self, data: bytes):
+        """Chiamato dal protocollo nel thread dell'event loop"""
+        self._increment_stat("responses_received")
+        try:
+            self._dispatch_response(data)
+        except Exception as e:
+            print(f"[VISCA ASYNC] Errore ricezione: {e}")
+        self._expire_pending()
+
+    def _send_request(self, cam_id: int, compiled: CompiledCommand,
+                      attempt: int = 0, retry: bool = True) -> PendingRequest:
+        """Registra la richiesta e invia il datagramma"""
+        if self._transport is None:
+            raise ConnectionError("Endpoint UDP non inizializzato")
+
+        sequence = self.sequence
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+
+        future = asyncio.get_running_loop().create_future()
+        pending = PendingRequest(sequence, cam_id, compiled.is_inquiry, future, compiled,
+                                 attempt, self.get_response_timeout(cam_id, attempt), retry)
+        with self._pending_lock:
+            self._pending[sequence] = pending
+
+        self._transport.sendto(build_visca_ip_packet(compiled.message, sequence),
+                               (self.server_ip, VISCA_PORT))
+        self._increment_stat("commands_sent", cam_id)
+        return pending
+
+    async def _acquire_command_socket(self, cam_id: int):
+        """Attende un posto libero nei socket comandi della telecamera"""
+        sockets = self._command_sockets[cam_id]
+        event = self._socket_events[cam_id]
+        while not sockets.available(time.monotonic()):
+            event.clear()
+            wait = sockets.wait_time(time.monotonic())
+            try:
+                await asyncio.wait_for(event.wait(), None if wait == float('inf') else wait)
+            except (asyncio.TimeoutError, TimeoutError):
+                pass
+        sockets.acquire()
+
+    def _release_command_socket(self, cam_id: int, sequence: int = -1,
+                                socket_no: Optional[int] = None):
+        self._command_sockets[cam_id].release(sequence, socket_no)
+        event = self._socket_events.get(cam_id)
+        if event is not None:
+            event.set()
+
+    def _on_request_ack(self, pending: PendingRequest):
+        """ACK: registra quale socket comandi esegue il comando"""
+        self._command_sockets[pending.cam_id].ack(pending.socket, pending.sequence)
+
+    def _on_request_done(self, pending: PendingRequest, payload: Optional[bytes]) -> bool:
+        """
+        Libera il posto del comando chiuso
+
+        Un rifiuto per socket o buffer pieni risolve il Future con _REJECTED:
+        send() ripete il comando dopo la pausa di RETRY_DELAY.
+        """
+        if pending.is_inquiry:
+            return False
+        self._release_command_socket(pending.cam_id, pending.sequence, pending.socket)
+        rejected = (payload is not None and (payload[1] & 0xF0) == 0x60 and
+                    payload[2] in (0x03, 0x05))
+        if not rejected or pending.future.done():
+            return False
+        self._command_sockets[pending.cam_id].block(self.RETRY_DELAY)
+        pending.future.set_result(_REJECTED)
+        return True
+
+    async def _wait_reply(self, pending: PendingRequest, timeout: float) -> Optional[str]:
+        """
+        Attende la risposta: timeout fino alla prima risposta, poi, se è
+        arrivato l'ACK, fino a COMPLETION_TIMEOUT dall'invio per il Completion
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(pending.future), timeout)
+        except (asyncio.TimeoutError, TimeoutError):
+            if pending.socket is None or pending.future.done():
+                raise
+        remaining = pending.sent_at + self.COMPLETION_TIMEOUT - time.time()
+        return await asyncio.wait_for(asyncio.shield(pending.future), max(0.0, remaining))
+
+    async def send(self, cam_id: int, hex_cmd: str,
+                   timeout: Optional[float] = None, retry: bool = True) -> Optional[str]:
+        """
+        Invia un comando VISCA e attende la risposta
+
+        Un comando accettato (ACK) resta aperto fino al Completion, entro
+        COMPLETION_TIMEOUT dall'invio. Senza alcuna risposta l'RTO della
+        telecamera raddoppia e i comandi idempotenti sono ritrasmessi.
+
+        Args:
+            cam_id: ID telecamera (1-6)
+            hex_cmd: Comando in stringa esadecimale
+            timeout: Attesa della prima risposta (default: adattivo sull'RTT,
+                raddoppiato a ogni ritrasmissione)
+            retry: Ritrasmetti (fino a MAX_RETRIES volte) i comandi idempotenti
+                rimasti senza risposta
+
+        Returns:
+            str: Messaggio di errore o None (anche in caso di timeout)
+        """
+        try:
+            compiled = compile_command(cam_id, hex_cmd)
+        except Exception as e:
+            self._increment_stat("errors", cam_id)
+            return f"Errore invio VISCA: {e}"
+
+        attempt = 0
+        while True:
+            if not compiled.is_inquiry:
+                await self._acquire_command_socket(cam_id)
+            try:
+                pending = self._send_request(cam_id, compiled, attempt, retry)
+            except Exception as e:
+                if not compiled.is_inquiry:
+                    self._release_command_socket(cam_id)
+                self._increment_stat("errors", cam_id)
+                return f"Errore invio VISCA: {e}"
+
+            wait = timeout if timeout is not None else pending.timeout
+            try:
+                result = await self._wait_reply(pending, wait)
+            except (asyncio.TimeoutError, TimeoutError):
+                with self._pending_lock:
+                    expired = self._pending.pop(pending.sequence, None)
+                if expired is not None:
+                    self._increment_stat("timeouts", cam_id)
+                    if expired.socket is None:
+                        self._rtt[cam_id].backoff()
+                    self._on_request_done(expired, None)
+                    expired.future.cancel()
+                # Dopo l'ACK il comando è in esecuzione: ritrasmetterlo lo ripeterebbe
+                if (retry and self._running and pending.socket is None and
+                        compiled.is_idempotent and attempt < self.MAX_RETRIES):
+                    attempt += 1
+                    self._increment_stat("retransmissions", cam_id)
+                    continue
+                return None
+
+            if result is not _REJECTED:
+                return result
+            # Non eseguito dalla telecamera: si ripete dopo la pausa sui socket
+            if attempt >= self.MAX_RETRIES:
+                return "Comando rifiutato: socket o buffer comandi pieni"
+            attempt += 1
+            self._increment_stat("commands_requeued", cam_id)
+
+    def send_without_response(self, cam_id: int, hex_cmd: str):
+        """
+        Invia comando VISCA senza aspettare risposta (per comandi di stop)
+
+        Il comando passa comunque dai socket comandi: send() gira in un task.
+
+        Args:
+            cam_id: ID telecamera (1-6)
+            hex_cmd: Comando in stringa esadecimale
+        """
+        try:
+            task = asyncio.get_running_loop().create_task(self.send(cam_id, hex_cmd))
+        except Exception as e:
+            print(f"[VISCA ASYNC ERROR] Send without response: {e}")
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _on_subscriptions_changed(self):
+        """Risveglia lo scheduler (subscribe può arrivare da un altro thread)"""
+        if self._running and self._loop is not None and self._schedule_event is not None:
+            self._loop.call_soon_threadsafe(self._schedule_event.set)
+
+    async def _sync_loop(self):
+        """Interroga solo le telecamere osservate il cui stato è in scadenza"""
+        while self._running:
+            self._schedule_event.clear()
+            stale, next_due = self._stale_cameras(time.time())
+            # Una inquiry per telecamera, tutte insieme
+            if stale:
+                await asyncio.gather(
+                    # Nessuna ritrasmissione: lo scheduler la ripete alla scadenza
+                    *(self.send(cam_id, STATUS_INQUIRY, retry=False) for cam_id in stale)
+                )
+                continue
+            self._expire_pending()
+            try:
+                await asyncio.wait_for(self._schedule_event.wait(),
+                                       min(next_due, self.SYNC_INTERVAL))
+            except (asyncio.TimeoutError, TimeoutError):
+                pass
+
+    async def close(self):
+        """Chiudi endpoint e ferma il loop di sincronizzazione"""
+        print("[VISCA ASYNC] Chiusura controller...")
+        self._running = False
+
+        for task in list(self._background):
+            task.cancel()
+
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+
+        if self._transport is not None:
+            self._transport.close()
+
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for p in pending:
+            p.future.cancel()
+
+        stats = self.get_statistics()
+        print(f"[VISCA ASYNC] Statistiche finali: {stats}")
@@ -6,6 +6,10 @@ CLIENT_BIND_IP = "0.0.0.0"
 VISCA_PORT = 52381        # Porta di destinazione (Simulatore)
 CLIENT_PORT = 0           # <--- AGGIUNGI O MODIFICA QUESTA
 
+# Fleet mode: una telecamera IP per host. Vuoto = 6 telecamere sul server unico
+# Formato: {cam_id: (host, porta, indirizzo VISCA)}, es. {1: ("10.91.60.21", 52381, 1)}
+CAMERA_FLEET = {}
+
 # Window Configuration
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
@@ -31,6 +35,15 @@ FACE_MIN_ZOOM = 1.4
 FACE_ZOOM_DECREASE_STEP = 0.02
 FACE_PAN_SENSITIVITY = 0.0006
 FACE_TILT_SENSITIVITY = 0.0006
+FACE_DETECTOR_BACKEND = "auto"  # "auto" (YuNet se presente, altrimenti Haar), "yunet", "haar"
+FACE_DETECT_WIDTH = 320         # Larghezza dell'immagine ridotta su cui gira la detection
+FACE_MIN_SIZE = 50              # Lato minimo del volto (pixel del frame originale)
+FACE_SCORE_THRESHOLD = 0.7      # Confidenza minima YuNet
+FACE_HAAR_CASCADE = None        # None = haarcascade_frontalface_default.xml di OpenCV
+FACE_YUNET_MODEL = "models/face_detection_yunet_2023mar.onnx"  # Relativo a client/
+
+# JPEG Encoder Configuration (streaming web)
+JPEG_ENCODER_BACKEND = "auto"   # "auto" (il più veloce al benchmark di avvio), "turbojpeg", "pyav", "opencv"
 
 # Video Thread Configuration
 VIDEO_FRAME_DELAY = 0.03
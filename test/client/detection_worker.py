@@ -0,0 +1,197 @@
+"""
+Detection Worker - Pool di thread per il tracciamento volti fuori dal loop di rendering
+I worker prendono l'ultimo frame dallo stadio di cattura, aggiornano il
+tracker della telecamera e pubblicano un risultato con il timestamp del
+frame; il loop video usa l'ultimo risultato estrapolato all'istante corrente,
+senza mai attendere la detection.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from face_detector import FaceBox
+from face_tracker import FaceTracker
+from frame_capture import FrameCapture
+
+
+class Detection:
+    """Risultato di tracciamento di una telecamera su un frame (immutabile)"""
+    __slots__ = ("cam_id", "sequence", "timestamp", "box", "velocity")
+
+    def __init__(self, cam_id: int, sequence: int, timestamp: float,
+                 box: Optional[FaceBox], velocity: Tuple[float, float] = (0.0, 0.0)):
+        """
+        Args:
+            sequence, timestamp: Sequenza e istante di cattura del frame analizzato
+            box: Riquadro del volto (None = nessun volto)
+            velocity: Velocità del centro del riquadro in pixel/s
+        """
+        object.__setattr__(self, "cam_id", cam_id)
+        object.__setattr__(self, "sequence", sequence)
+        object.__setattr__(self, "timestamp", timestamp)
+        object.__setattr__(self, "box", box)
+        object.__setattr__(self, "velocity", velocity)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Detection è immutabile")
+
+    def predict(self, now: float, max_extrapolation: float) -> Optional[FaceBox]:
+        """Riquadro spostato lungo la velocità fino a now (al massimo max_extrapolation s)"""
+        if self.box is None:
+            return None
+        dt = min(max(0.0, now - self.timestamp), max_extrapolation)
+        x, y, w, h = self.box
+        vx, vy = self.velocity
+        return (int(round(x + vx * dt)), int(round(y + vy * dt)), w, h)
+
+
+class DetectionWorkerPool:
+    """
+    Worker condivisi da tutte le telecamere in TRACK
+
+    Ogni worker sceglie la telecamera attiva servita da più tempo che non ha
+    ancora visto l'ultimo frame, trattiene il frame (nessuna copia) per la
+    durata dell'aggiornamento e pubblica un Detection. Il tracker di una
+    telecamera è usato da un solo worker alla volta. Thread e non processi:
+    resize, cvtColor, matchTemplate e detectMultiScale rilasciano il GIL.
+    """
+
+    WORKERS = 1
+    # Oltre questo ritardo il risultato non viene più estrapolato
+    MAX_EXTRAPOLATION = 0.2
+    IDLE_WAIT = 0.1  # Attesa massima di un frame o di una telecamera attiva
+
+    def __init__(self, capture: FrameCapture, tracker_factory: Callable[[int], FaceTracker],
+                 workers: int = WORKERS):
+        """
+        Args:
+            capture: Stadio di cattura da cui leggere i frame
+            tracker_factory: Crea il tracker di una telecamera (chiamata alla prima attivazione)
+            workers: Numero di thread worker
+        """
+        self.capture = capture
+        self.tracker_factory = tracker_factory
+        self.workers = workers
+
+        self._trackers: Dict[int, FaceTracker] = {}
+        self._results: Dict[int, Detection] = {}
+        self._active: Set[int] = set()
+        self._busy: Set[int] = set()
+        self._seen: Dict[int, int] = {}  # Ultima sequenza analizzata per telecamera
+        self._served_at: Dict[int, float] = {}
+        self._lock = threading.Condition()
+
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Avvia i worker (no-op se già avviati)"""
+        if self._threads:
+            return
+        self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"detection-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Ferma i worker"""
+        self._running = False
+        with self._lock:
+            self._lock.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=0.5)
+        self._threads = []
+
+    def set_cameras(self, cam_ids: Iterable[int]):
+        """Imposta le telecamere da tracciare; le altre vengono azzerate"""
+        cam_ids = set(cam_ids)
+        with self._lock:
+            if cam_ids == self._active:
+                return
+            for cam_id in self._active - cam_ids:
+                self._results.pop(cam_id, None)
+                self._seen.pop(cam_id, None)
+                tracker = self._trackers.get(cam_id)
+                if tracker is not None and cam_id not in self._busy:
+                    tracker.reset()
+            self._active = cam_ids
+            self._lock.notify_all()
+
+    def latest(self, cam_id: int) -> Optional[Detection]:
+        """Ultimo risultato della telecamera (None se non ancora disponibile)"""
+        return self._results.get(cam_id)
+
+    def predicted_box(self, cam_id: int, now: Optional[float] = None) -> Optional[FaceBox]:
+        """Riquadro dell'ultimo risultato compensato per la sua latenza"""
+        result = self._results.get(cam_id)
+        if result is None:
+            return None
+        return result.predict(time.time() if now is None else now, self.MAX_EXTRAPOLATION)
+
+    def _next_camera(self, sequence: int) -> Optional[int]:
+        """Telecamera libera che non ha visto sequence, servita da più tempo (con lock)"""
+        candidates = [
+            cam_id for cam_id in self._active
+            if cam_id not in self._busy and self._seen.get(cam_id, 0) < sequence
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: self._served_at.get(c, 0.0))
+
+    def _worker_loop(self):
+        while self._running:
+            frame = self.capture.latest()
+            sequence = frame.sequence if frame is not None else 0
+
+            with self._lock:
+                cam_id = self._next_camera(sequence)
+                if cam_id is not None:
+                    self._busy.add(cam_id)
+                    self._seen[cam_id] = sequence
+                    tracker = self._trackers.get(cam_id)
+
+            if cam_id is None:
+                if frame is not None:
+                    frame.release()
+                # Nessun lavoro: attende il prossimo frame (o una nuova telecamera)
+                if self._active:
+                    newer = self.capture.wait_newer(sequence, self.IDLE_WAIT)
+                    if newer is not None:
+                        newer.release()
+                else:
+                    with self._lock:
+                        self._lock.wait(self.IDLE_WAIT)
+                continue
+
+            try:
+                with frame:
+                    if tracker is None:
+                        tracker = self.tracker_factory(cam_id)
+                        self._trackers[cam_id] = tracker
+                    box = tracker.update(frame.image)
+                    self._publish(cam_id, frame.sequence, frame.timestamp, box)
+            except Exception as e:
+                print(f"[DETECTION ERROR] CAM {cam_id}: {e}")
+            finally:
+                with self._lock:
+                    self._busy.discard(cam_id)
+                    self._served_at[cam_id] = time.monotonic()
+                    if cam_id not in self._active and cam_id in self._trackers:
+                        self._trackers[cam_id].reset()
+
+    def _publish(self, cam_id: int, sequence: int, timestamp: float, box: Optional[FaceBox]):
+        """Pubblica il risultato con la velocità stimata dal precedente"""
+        velocity = (0.0, 0.0)
+        previous = self._results.get(cam_id)
+        if box is not None and previous is not None and previous.box is not None:
+            dt = timestamp - previous.timestamp
+            if dt > 0:
+                velocity = (
+                    (box[0] + box[2] / 2 - previous.box[0] - previous.box[2] / 2) / dt,
+                    (box[1] + box[3] / 2 - previous.box[1] - previous.box[3] / 2) / dt,
+                )
+        with self._lock:
+            if cam_id in self._active:
+                self._results[cam_id] = Detection(cam_id, sequence, timestamp, box, velocity)
@@ -0,0 +1,187 @@
+"""
+Digital PTZ - Zoom digitale con un solo warpAffine
+Pan, tilt e zoom vengono quantizzati su una griglia; la matrice affine è
+ricalcolata solo quando lo stato quantizzato cambia e il frame è ritagliato e
+scalato in un'unica passata cv2.warpAffine in un buffer di uscita
+preallocato. L'interpolazione dipende dal livello di qualità: nearest
+mentre l'inquadratura si muove, lineare (o cubica) da ferma.
+smooth_damp() porta pan/tilt/zoom verso il target con una molla a
+smorzamento critico basata sul tempo trascorso, indipendente dal frame rate.
+"""
+
+import math
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Livelli di qualità
+QUALITY_FAST = "fast"          # Nearest: inquadratura in movimento
+QUALITY_BALANCED = "balanced"  # Lineare: inquadratura ferma
+QUALITY_HIGH = "high"          # Cubica: inquadratura ferma, CPU permettendo
+
+INTERPOLATION = {
+    QUALITY_FAST: cv2.INTER_NEAREST,
+    QUALITY_BALANCED: cv2.INTER_LINEAR,
+    QUALITY_HIGH: cv2.INTER_CUBIC,
+}
+
+# Griglia di quantizzazione: sotto il pixel fino a 4K, così il ritaglio si
+# sposta in modo continuo (posizionamento sub-pixel tramite la matrice affine)
+ZOOM_STEPS = 1000       # Passi per unità di zoom (0.001x)
+POSITION_STEPS = 16384  # Passi sull'intervallo 0.0-1.0 di pan/tilt
+
+# Sotto queste soglie smooth_damp aggancia il target (stato fermo, qualità piena)
+SNAP_DISTANCE = 1e-5
+SNAP_VELOCITY = 1e-4
+
+
+def smooth_damp(current: float, target: float, velocity: float,
+                time_constant: float, dt: float) -> Tuple[float, float]:
+    """
+    Passo esatto di una molla a smorzamento critico verso target
+
+    La soluzione è in forma chiusa, quindi lo stesso intervallo di tempo dà lo
+    stesso movimento a 15, 30 o 60 FPS, e un frame in ritardo (dt grande)
+    avvicina il valore al target senza oscillare né superarlo.
+
+    Args:
+        time_constant: Costante di tempo in secondi (~63% della distanza coperta
+            in un tempo dell'ordine di time_constant)
+        dt: Secondi trascorsi dal passo precedente
+
+    Returns:
+        Tuple[float, float]: Nuovo valore e nuova velocità (unità/s)
+    """
+    if dt <= 0:
+        return current, velocity
+    if time_constant <= 0:
+        return target, 0.0
+    omega = 2.0 / time_constant
+    change = current - target
+    temp = (velocity + omega * change) * dt
+    decay = math.exp(-omega * dt)
+    change = (change + temp) * decay
+    velocity = (velocity - omega * temp) * decay
+    if abs(change) < SNAP_DISTANCE and abs(velocity) < SNAP_VELOCITY:
+        return target, 0.0
+    return target + change, velocity
+
+
+def _affine_matrix(zoom_q: int, pan_q: int, tilt_q: int,
+                   in_size: Tuple[int, int], out_size: Tuple[int, int],
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Matrice affine 2x3 inversa (pixel di uscita -> pixel di ingresso) di uno
+    stato quantizzato, da usare con WARP_INVERSE_MAP
+
+    Il ritaglio ha le proporzioni dell'ingresso ridotte di zoom, centro in
+    (pan, tilt) spostato quanto basta a restare dentro il frame. I centri dei
+    pixel si corrispondono come in cv2.resize.
+
+    Args:
+        out: Matrice 2x3 float32 da riempire (None = nuova)
+    """
+    in_w, in_h = in_size
+    out_w, out_h = out_size
+    zoom = max(1.0, zoom_q / ZOOM_STEPS)
+    crop_w, crop_h = in_w / zoom, in_h / zoom
+
+    cx = min(max(pan_q / POSITION_STEPS * in_w, crop_w / 2), in_w - crop_w / 2)
+    cy = min(max(tilt_q / POSITION_STEPS * in_h, crop_h / 2), in_h - crop_h / 2)
+    x1, y1 = cx - crop_w / 2, cy - crop_h / 2
+
+    kx, ky = crop_w / out_w, crop_h / out_h
+    matrix = np.zeros((2, 3), dtype=np.float32) if out is None else out
+    matrix[0] = (kx, 0.0, x1 + 0.5 * kx - 0.5)
+    matrix[1] = (0.0, ky, y1 + 0.5 * ky - 0.5)
+    return matrix
+
+
+class DigitalPTZ:
+    """
+    Motore di zoom digitale con buffer di uscita proprio
+
+    Un'istanza per thread di rendering (buffer e matrice non sono
+    condivisibili). La matrice è ricalcolata solo se cambiano lo stato
+    quantizzato o le dimensioni: niente cache tra stati, perché con la griglia
+    sub-pixel quasi ogni frame in movimento ha uno stato nuovo.
+    """
+
+    # Dopo quanto tempo senza cambi di stato l'inquadratura è considerata ferma
+    STILL_DELAY = 0.15
+
+    def __init__(self, still_quality: str = QUALITY_BALANCED,
+                 moving_quality: str = QUALITY_FAST):
+        """
+        Args:
+            still_quality: Livello di qualità a inquadratura ferma
+            moving_quality: Livello di qualità durante il movimento
+        """
+        self.still_quality = still_quality
+        self.moving_quality = moving_quality
+        self._out: Optional[np.ndarray] = None
+        self._last_state: Optional[Tuple[int, int, int]] = None
+        self._last_change = 0.0
+        self._matrix = np.zeros((2, 3), dtype=np.float32)
+        self._matrix_key: Optional[tuple] = None
+
+    @staticmethod
+    def quantize(zoom: float, pan: float, tilt: float) -> Tuple[int, int, int]:
+        """Stato (zoom, pan, tilt) sulla griglia di quantizzazione"""
+        return (
+            int(round(max(1.0, zoom) * ZOOM_STEPS)),
+            int(round(min(max(pan, 0.0), 1.0) * POSITION_STEPS)),
+            int(round(min(max(tilt, 0.0), 1.0) * POSITION_STEPS)),
+        )
+
+    def render(self, frame: np.ndarray, zoom: float, pan: float, tilt: float,
+               out: Optional[np.ndarray] = None,
+               out_size: Optional[Tuple[int, int]] = None,
+               quality: Optional[str] = None) -> np.ndarray:
+        """
+        Ritaglia e scala il frame secondo lo stato PTZ
+
+        Args:
+            zoom: Fattore di zoom (>= 1.0)
+            pan, tilt: Centro dell'inquadratura normalizzato 0.0-1.0
+            out: Buffer di destinazione (None = buffer interno)
+            out_size: Dimensioni (w, h) di uscita se out è None (None = come il frame)
+            quality: Livello di qualità (None = automatico movimento/fermo)
+
+        Returns:
+            np.ndarray: Il buffer di uscita, o frame stesso se lo stato è
+                l'identità e le dimensioni coincidono
+        """
+        h, w = frame.shape[:2]
+        if out is not None:
+            out_size = (out.shape[1], out.shape[0])
+        elif out_size is None:
+            out_size = (w, h)
+
+        state = self.quantize(zoom, pan, tilt)
+        now = time.monotonic()
+        if state != self._last_state:
+            self._last_state = state
+            self._last_change = now
+        if quality is None:
+            moving = now - self._last_change < self.STILL_DELAY
+            quality = self.moving_quality if moving else self.still_quality
+
+        if state[0] == ZOOM_STEPS and out_size == (w, h):
+            return frame
+
+        if out is None:
+            shape = (out_size[1], out_size[0]) + frame.shape[2:]
+            if self._out is None or self._out.shape != shape:
+                self._out = np.empty(shape, dtype=frame.dtype)
+            out = self._out
+
+        key = (state, (w, h), out_size)
+        if key != self._matrix_key:
+            _affine_matrix(state[0], state[1], state[2], (w, h), out_size, self._matrix)
+            self._matrix_key = key
+        return cv2.warpAffine(frame, self._matrix, out_size, dst=out,
+                              flags=INTERPOLATION[quality] | cv2.WARP_INVERSE_MAP,
+                              borderMode=cv2.BORDER_REPLICATE)
@@ -0,0 +1,224 @@
+"""
+Face Detector - Backend intercambiabili per il rilevamento dei volti
+Haar Cascade (incluso in OpenCV) e rete YuNet su OpenCV DNN (CPU). La
+detection gira su una copia ridotta del frame (larghezza configurabile) e
+i riquadri vengono riportati alle coordinate del frame originale.
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import (
+    FACE_DETECTOR_BACKEND, FACE_DETECT_WIDTH, FACE_MIN_SIZE,
+    FACE_HAAR_CASCADE, FACE_YUNET_MODEL, FACE_SCORE_THRESHOLD
+)
+
+# Riquadro volto (x, y, w, h) in pixel del frame originale
+FaceBox = Tuple[int, int, int, int]
+
+# Percorsi relativi dei modelli risolti rispetto alla cartella del client
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _resolve_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(_BASE_DIR, path)
+
+
+class FaceDetector:
+    """
+    Interfaccia comune dei detector
+
+    detect() riduce il frame a detect_width pixel di larghezza (mai ingrandito),
+    delega al backend e riscala i riquadri. I buffer ridotti sono preallocati
+    e riusati finché la risoluzione non cambia. Con roi la ricerca è limitata
+    a una regione del frame, alla stessa scala della scansione completa.
+    """
+
+    name = "base"
+
+    def __init__(self, detect_width: int = FACE_DETECT_WIDTH, min_size: int = FACE_MIN_SIZE):
+        """
+        Args:
+            detect_width: Larghezza dell'immagine su cui gira la detection
+            min_size: Lato minimo del volto in pixel del frame originale
+        """
+        self.detect_width = detect_width
+        self.min_size = min_size
+        self._small: Optional[np.ndarray] = None
+
+    def detect(self, frame: np.ndarray, roi: Optional[FaceBox] = None,
+               size_range: Optional[Tuple[int, int]] = None) -> List[FaceBox]:
+        """
+        Rileva i volti in un frame BGR
+
+        Args:
+            roi: Regione (x, y, w, h) a cui limitare la ricerca (None = frame intero)
+            size_range: Lato minimo e massimo del volto in pixel del frame
+                (None = da min_size senza massimo)
+
+        Returns:
+            List[FaceBox]: Riquadri (x, y, w, h) in coordinate del frame
+        """
+        if frame is None or frame.size == 0 or frame.ndim != 3:
+            return []
+
+        # La scala dipende dal frame intero: una ROI è cercata alla stessa risoluzione
+        scale = min(1.0, self.detect_width / frame.shape[1])
+        ox = oy = 0
+        if roi is not None:
+            x, y, rw, rh = roi
+            ox, oy = max(0, x), max(0, y)
+            frame = frame[oy:min(frame.shape[0], y + rh), ox:min(frame.shape[1], x + rw)]
+            if frame.size == 0:
+                return []
+
+        h, w = frame.shape[:2]
+        if scale < 1.0:
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            if roi is not None:
+                # Le ROI cambiano forma a ogni chiamata: niente buffer preallocato
+                small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            else:
+                if self._small is None or self._small.shape[1::-1] != size:
+                    self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+                # INTER_AREA: la riduzione più fedele per la detection
+                small = cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+
+        min_size, max_size = size_range if size_range is not None else (self.min_size, 0)
+        boxes = self._detect_scaled(
+            small, max(1, int(min_size * scale)), int(max_size * scale)
+        )
+        if scale == 1.0 and roi is None:
+            return boxes
+        inv = 1.0 / scale
+        return [
+            (ox + int(x * inv), oy + int(y * inv), int(bw * inv), int(bh * inv))
+            for x, y, bw, bh in boxes
+        ]
+
+    def _detect_scaled(self, image: np.ndarray, min_size: int, max_size: int) -> List[FaceBox]:
+        """
+        Detection sull'immagine ridotta (coordinate dell'immagine ridotta)
+
+        Args:
+            min_size, max_size: Lato del volto in pixel dell'immagine (max_size 0 = nessun limite)
+        """
+        raise NotImplementedError
+
+
+class HaarFaceDetector(FaceDetector):
+    """Haar Cascade frontale fornito con OpenCV"""
+
+    name = "haar"
+
+    def __init__(self, cascade_path: Optional[str] = FACE_HAAR_CASCADE,
+                 scale_factor: float = 1.1, min_neighbors: int = 6, **kwargs):
+        """
+        Args:
+            cascade_path: File XML del classificatore (None = quello di OpenCV)
+            scale_factor, min_neighbors: Parametri di detectMultiScale
+        """
+        super().__init__(**kwargs)
+        if cascade_path is None:
+            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        else:
+            cascade_path = _resolve_path(cascade_path)
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(f"Haar Cascade non trovato: {cascade_path}")
+        self.path = cascade_path
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self._gray: Optional[np.ndarray] = None
+
+    def _detect_scaled(self, image: np.ndarray, min_size: int, max_size: int) -> List[FaceBox]:
+        if self._gray is None or self._gray.shape != image.shape[:2]:
+            self._gray = np.empty(image.shape[:2], dtype=np.uint8)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        # Un intervallo di scale stretto riduce le passate della piramide
+        faces = self.cascade.detectMultiScale(
+            gray, self.scale_factor, self.min_neighbors,
+            minSize=(min_size, min_size), maxSize=(max_size, max_size)
+        )
+        return [tuple(int(v) for v in face) for face in faces]
+
+
+class YuNetFaceDetector(FaceDetector):
+    """Rete YuNet (ONNX) su OpenCV DNN, backend e target CPU"""
+
+    name = "yunet"
+
+    def __init__(self, model_path: str = FACE_YUNET_MODEL,
+                 score_threshold: float = FACE_SCORE_THRESHOLD, **kwargs):
+        """
+        Args:
+            model_path: File ONNX del modello (relativo alla cartella del client)
+            score_threshold: Confidenza minima di un volto
+        """
+        super().__init__(**kwargs)
+        if not hasattr(cv2, "FaceDetectorYN"):
+            raise RuntimeError("cv2.FaceDetectorYN richiede OpenCV >= 4.5.4")
+        model_path = _resolve_path(model_path)
+        if not os.path.isfile(model_path):
+            raise FileNotFoundError(f"Modello YuNet non trovato: {model_path}")
+        self.path = model_path
+        self._net = cv2.FaceDetectorYN.create(
+            model_path, "", (self.detect_width, self.detect_width), score_threshold,
+            0.3, 50, cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU
+        )
+        self._input_size: Optional[Tuple[int, int]] = None
+
+    def _detect_scaled(self, image: np.ndarray, min_size: int, max_size: int) -> List[FaceBox]:
+        size = (image.shape[1], image.shape[0])
+        if size != self._input_size:
+            self._net.setInputSize(size)
+            self._input_size = size
+        _, faces = self._net.detect(image)
+        if faces is None:
+            return []
+        boxes = []
+        for face in faces:
+            x, y, w, h = (int(v) for v in face[:4])
+            if w >= min_size and h >= min_size and (not max_size or max(w, h) <= max_size):
+                boxes.append((max(0, x), max(0, y), w, h))
+        return boxes
+
+
+# Backend in ordine di preferenza per "auto"
+DETECTOR_BACKENDS = {
+    "yunet": YuNetFaceDetector,
+    "haar": HaarFaceDetector,
+}
+
+
+def create_face_detector(backend: str = FACE_DETECTOR_BACKEND, **kwargs) -> Optional[FaceDetector]:
+    """
+    Crea il detector configurato con fallback
+
+    Args:
+        backend: "auto" (YuNet se il modello è presente, altrimenti Haar),
+            "yunet" o "haar"
+
+    Returns:
+        FaceDetector: Detector pronto, o None se nessun backend è disponibile
+    """
+    names = list(DETECTOR_BACKENDS) if backend == "auto" else [backend]
+    for name in names:
+        detector_class = DETECTOR_BACKENDS.get(name)
+        if detector_class is None:
+            print(f"[FACE] Backend sconosciuto: {name}")
+            continue
+        try:
+            detector = detector_class(**kwargs)
+            print(f"[FACE] Face detection enabled - {name} ({detector.path}), "
+                  f"detection a {detector.detect_width}px")
+            return detector
+        except Exception as e:
+            print(f"[FACE] Backend {name} non disponibile: {e}")
+    print("[FACE] Face detection disabled")
+    return None
@@ -0,0 +1,240 @@
+"""
+Face Tracker - Detect-then-track per la modalità TRACK
+Il detector gira solo ogni N aggiornamenti o quando la confidenza cala; tra
+una detection e l'altra il volto è seguito con template matching in una ROI
+attorno all'ultima posizione, e un filtro di Kalman a velocità costante
+smorza il riquadro (niente salti quando la detection sfarfalla).
+"""
+
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from face_detector import FaceBox, FaceDetector
+
+
+class BoxKalmanFilter:
+    """
+    Kalman a velocità costante sul riquadro
+
+    Stato: centro (cx, cy), dimensioni (w, h) e velocità del centro (vx, vy);
+    misura: cx, cy, w, h. Il passo è un aggiornamento del tracker.
+    """
+
+    def __init__(self, process_noise: float = 1e-2, measurement_noise: float = 1e-1):
+        kf = cv2.KalmanFilter(6, 4)
+        kf.transitionMatrix = np.array([
+            [1, 0, 0, 0, 1, 0],
+            [0, 1, 0, 0, 0, 1],
+            [0, 0, 1, 0, 0, 0],
+            [0, 0, 0, 1, 0, 0],
+            [0, 0, 0, 0, 1, 0],
+            [0, 0, 0, 0, 0, 1],
+        ], dtype=np.float32)
+        kf.measurementMatrix = np.eye(4, 6, dtype=np.float32)
+        kf.processNoiseCov = np.eye(6, dtype=np.float32) * process_noise
+        kf.measurementNoiseCov = np.eye(4, dtype=np.float32) * measurement_noise
+        self._kf = kf
+        self._measurement = np.zeros((4, 1), dtype=np.float32)
+        self.initialized = False
+
+    def reset(self, box: FaceBox):
+        """Riparte dal riquadro indicato, con velocità nulla"""
+        x, y, w, h = box
+        self._kf.statePost = np.array(
+            [[x + w / 2], [y + h / 2], [w], [h], [0], [0]], dtype=np.float32
+        )
+        self._kf.errorCovPost = np.eye(6, dtype=np.float32)
+        self.initialized = True
+
+    def predict(self) -> FaceBox:
+        """Avanza di un passo e restituisce il riquadro previsto"""
+        return self._to_box(self._kf.predict())
+
+    def correct(self, box: FaceBox) -> FaceBox:
+        """Integra una misura e restituisce il riquadro filtrato"""
+        x, y, w, h = box
+        self._measurement[:, 0] = (x + w / 2, y + h / 2, w, h)
+        return self._to_box(self._kf.correct(self._measurement))
+
+    @staticmethod
+    def _to_box(state: np.ndarray) -> FaceBox:
+        cx, cy, w, h = (float(v) for v in state[:4, 0])
+        return (int(round(cx - w / 2)), int(round(cy - h / 2)), int(round(w)), int(round(h)))
+
+
+class FaceTracker:
+    """
+    Segue un volto alternando detection completa e template matching
+
+    update() restituisce il riquadro filtrato del volto seguito (o None se
+    perso). La detection completa gira quando non c'è un volto, ogni
+    detect_interval aggiornamenti, o quando il match scende sotto
+    min_confidence.
+    """
+
+    DETECT_INTERVAL = 10  # Aggiornamenti tra due detection complete
+    MIN_CONFIDENCE = 0.6  # Score TM_CCOEFF_NORMED sotto cui si rifà la detection
+    SEARCH_MARGIN = 0.5  # ROI di ricerca: riquadro allargato di questa frazione per lato
+    TEMPLATE_SIZE = 48  # Lato massimo del template (il match gira a questa scala)
+    ROI_PADDING = 1.0  # Ri-detection: riquadro allargato di questa frazione per lato
+    ROI_SIZE_RANGE = (0.7, 1.4)  # Ri-detection: lato del volto rispetto al precedente
+
+    def __init__(self, detector: FaceDetector, detect_interval: int = DETECT_INTERVAL,
+                 min_confidence: float = MIN_CONFIDENCE):
+        """
+        Args:
+            detector: Detector usato per (ri)agganciare il volto
+            detect_interval: Aggiornamenti tra due detection complete
+            min_confidence: Score minimo del template matching
+        """
+        self.detector = detector
+        self.detect_interval = detect_interval
+        self.min_confidence = min_confidence
+
+        self._kalman = BoxKalmanFilter()
+        self._template: Optional[np.ndarray] = None
+        self._template_scale = 1.0
+        self._box: Optional[FaceBox] = None  # Ultimo riquadro misurato
+        self._since_detection = 0
+
+        self.confidence = 0.0
+        self.last_detections: List[FaceBox] = []
+        self.detections = 0
+        self.roi_detections = 0  # Ri-detection risolte nella ROI, senza scansione completa
+        self.tracked_updates = 0
+
+    def reset(self):
+        """Dimentica il volto seguito: il prossimo update() rifà la detection"""
+        self._box = None
+        self._template = None
+        self._kalman.initialized = False
+        self.confidence = 0.0
+        self.last_detections = []
+
+    @property
+    def box(self) -> Optional[FaceBox]:
+        """Ultimo riquadro misurato (non filtrato)"""
+        return self._box
+
+    def update(self, frame: np.ndarray) -> Optional[FaceBox]:
+        """
+        Aggiorna il tracciamento con un nuovo frame BGR
+
+        Returns:
+            FaceBox: Riquadro filtrato in coordinate del frame, o None se
+                nessun volto è seguito
+        """
+        if frame is None or frame.size == 0 or frame.ndim != 3:
+            return None
+
+        predicted = self._kalman.predict() if self._kalman.initialized else None
+        self._since_detection += 1
+
+        if (self._box is None or self._since_detection >= self.detect_interval or
+                self.confidence < self.min_confidence):
+            return self._detect(frame, predicted)
+
+        measured = self._match(frame)
+        self.tracked_updates += 1
+        if measured is None:
+            # Match insufficiente: resta sulla previsione e rifà la detection al prossimo giro
+            return predicted
+        self._box = measured
+        return self._kalman.correct(measured)
+
+    def _detect(self, frame: np.ndarray, predicted: Optional[FaceBox]) -> Optional[FaceBox]:
+        """
+        Detection; sceglie il volto più vicino alla previsione
+
+        Con un volto noto cerca prima in una ROI attorno all'ultima posizione,
+        con un intervallo di dimensioni ristretto; il frame intero solo se lì
+        non trova nulla.
+        """
+        self._since_detection = 0
+        self.detections += 1
+        faces = []
+        last = predicted if predicted is not None else self._box
+        if last is not None:
+            faces = self.detector.detect(frame, self._roi_around(last, frame.shape),
+                                         self._size_range(last))
+            if faces:
+                self.roi_detections += 1
+        if not faces:
+            faces = self.detector.detect(frame)
+        self.last_detections = faces
+        if not faces:
+            self.reset()
+            return None
+
+        if predicted is not None:
+            px, py = predicted[0] + predicted[2] / 2, predicted[1] + predicted[3] / 2
+            box = min(faces, key=lambda f: (f[0] + f[2] / 2 - px) ** 2 + (f[1] + f[3] / 2 - py) ** 2)
+        else:
+            box = max(faces, key=lambda f: f[2] * f[3])
+
+        self._set_template(frame, box)
+        self._box = box
+        self.confidence = 1.0
+        if not self._kalman.initialized:
+            self._kalman.reset(box)
+            return box
+        return self._kalman.correct(box)
+
+    def _roi_around(self, box: FaceBox, shape) -> FaceBox:
+        """Riquadro allargato di ROI_PADDING per lato, limitato al frame"""
+        x, y, w, h = box
+        px, py = int(w * self.ROI_PADDING), int(h * self.ROI_PADDING)
+        x1, y1 = max(0, x - px), max(0, y - py)
+        x2, y2 = min(shape[1], x + w + px), min(shape[0], y + h + py)
+        return (x1, y1, max(0, x2 - x1), max(0, y2 - y1))
+
+    def _size_range(self, box: FaceBox):
+        """Lato minimo e massimo atteso del volto, dal riquadro precedente"""
+        side = max(box[2], box[3])
+        low, high = self.ROI_SIZE_RANGE
+        return (max(1, int(side * low)), int(side * high) + 1)
+
+    def _set_template(self, frame: np.ndarray, box: FaceBox):
+        """Template in scala di grigi del volto, ridotto a TEMPLATE_SIZE"""
+        x, y, w, h = box
+        patch = frame[max(0, y):y + h, max(0, x):x + w]
+        if patch.size == 0:
+            self._template = None
+            return
+        scale = min(1.0, self.TEMPLATE_SIZE / max(w, h))
+        gray = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        self._template = gray
+        self._template_scale = scale
+
+    def _match(self, frame: np.ndarray) -> Optional[FaceBox]:
+        """Template matching nella ROI attorno all'ultimo riquadro"""
+        if self._template is None:
+            self.confidence = 0.0
+            return None
+
+        frame_h, frame_w = frame.shape[:2]
+        x, y, w, h = self._box
+        mx, my = int(w * self.SEARCH_MARGIN), int(h * self.SEARCH_MARGIN)
+        x1, y1 = max(0, x - mx), max(0, y - my)
+        x2, y2 = min(frame_w, x + w + mx), min(frame_h, y + h + my)
+
+        # Solo la ROI viene convertita e ridotta alla scala del template
+        scale = self._template_scale
+        roi = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        if scale < 1.0:
+            roi = cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        th, tw = self._template.shape
+        if roi.shape[0] < th or roi.shape[1] < tw:
+            self.confidence = 0.0
+            return None
+
+        scores = cv2.matchTemplate(roi, self._template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (lx, ly) = cv2.minMaxLoc(scores)
+        self.confidence = float(score)
+        if score < self.min_confidence:
+            return None
+        return (x1 + int(lx / scale), y1 + int(ly / scale), w, h)
@@ -0,0 +1,150 @@
+"""
+Fleet State - Tabella di stato delle telecamere basata su array NumPy
+Una riga per telecamera e una colonna per campo: normalizzazione, controllo
+stale e controllo limiti di tutta la flotta in una sola operazione vettoriale,
+senza cicli Python né lock per telecamera.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# NumPy è opzionale per il controller: senza, la tabella non è disponibile
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+
+# Colonne della tabella
+COL_PAN = 0
+COL_TILT = 1
+COL_ZOOM = 2
+COL_LAST_UPDATE = 3
+COL_VERSION = 4
+NUM_COLUMNS = 5
+
+# Limiti RAW (vedi ViscaControllerBase.is_camera_at_limit)
+PAN_TILT_LIMIT = 1000
+ZOOM_MIN = 100
+ZOOM_MAX = 400
+
+AXES = ("pan", "tilt", "zoom")
+
+
+class FleetStateTable:
+    """
+    Stato di tutte le telecamere in un unico array float64 (righe x colonne)
+
+    Lo scrittore (il thread di ricezione del controller) aggiorna una riga
+    alla volta; i lettori copiano l'intera tabella con una sola memcpy sotto
+    lock e lavorano sulla copia, quindi non vedono mai righe a metà.
+    """
+
+    def __init__(self, cam_ids: Iterable[int]):
+        """
+        Args:
+            cam_ids: ID delle telecamere, nell'ordine delle righe
+        """
+        if not HAS_NUMPY:
+            raise ImportError("FleetStateTable richiede numpy")
+
+        self.cam_ids = np.array(list(cam_ids), dtype=np.int64)
+        self._rows: Dict[int, int] = {int(cam_id): row for row, cam_id in enumerate(self.cam_ids)}
+
+        self._data = np.zeros((len(self.cam_ids), NUM_COLUMNS), dtype=np.float64)
+        self._data[:, COL_ZOOM] = 200  # Stesso default di CameraSnapshot
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.cam_ids)
+
+    def row_of(self, cam_id: int) -> int:
+        """Indice di riga della telecamera"""
+        return self._rows[cam_id]
+
+    def update(self, cam_id: int, pan: int, tilt: int, zoom: int,
+               last_update: float, version: int):
+        """Scrive la riga della telecamera (valori RAW)"""
+        row = self._rows.get(cam_id)
+        if row is None:
+            return
+        with self._lock:
+            self._data[row] = (pan, tilt, zoom, last_update, version)
+
+    def snapshot(self) -> 'np.ndarray':
+        """
+        Copia coerente della tabella
+
+        Returns:
+            np.ndarray: Array (telecamere, NUM_COLUMNS) con colonne COL_*
+        """
+        with self._lock:
+            return self._data.copy()
+
+    def normalized(self, data: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Stato normalizzato di tutte le telecamere
+
+        Args:
+            data: Copia da snapshot() (None = copia nuova)
+
+        Returns:
+            np.ndarray: Array (telecamere, 3): pan e tilt 0.0-1.0, zoom 1.0-4.0
+        """
+        if data is None:
+            data = self.snapshot()
+        out = np.empty((len(data), 3), dtype=np.float64)
+        np.add(data[:, COL_PAN:COL_ZOOM], PAN_TILT_LIMIT, out=out[:, :2])
+        out[:, :2] /= 2 * PAN_TILT_LIMIT
+        np.clip(out[:, :2], 0.0, 1.0, out=out[:, :2])
+        np.divide(data[:, COL_ZOOM], 100.0, out=out[:, 2])
+        np.clip(out[:, 2], 1.0, 4.0, out=out[:, 2])
+        return out
+
+    def stale(self, timeout: float, now: Optional[float] = None,
+              data: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Maschera delle telecamere con stato più vecchio di timeout secondi
+
+        Returns:
+            np.ndarray: Array bool (telecamere,)
+        """
+        if data is None:
+            data = self.snapshot()
+        if now is None:
+            now = time.time()
+        return (now - data[:, COL_LAST_UPDATE]) > timeout
+
+    def at_limit(self, data: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Telecamere ai limiti meccanici, per asse
+
+        Returns:
+            np.ndarray: Array bool (telecamere, 3) con colonne pan, tilt, zoom
+        """
+        if data is None:
+            data = self.snapshot()
+        out = np.empty((len(data), 3), dtype=bool)
+        np.greater_equal(np.abs(data[:, COL_PAN:COL_ZOOM]), PAN_TILT_LIMIT, out=out[:, :2])
+        zoom = data[:, COL_ZOOM]
+        np.logical_or(zoom <= ZOOM_MIN, zoom >= ZOOM_MAX, out=out[:, 2])
+        return out
+
+    def changed_since(self, versions: 'np.ndarray',
+                      data: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """
+        Maschera delle telecamere la cui versione differisce da quella indicata
+
+        Args:
+            versions: Versioni lette in precedenza (colonna COL_VERSION di uno snapshot)
+        """
+        if data is None:
+            data = self.snapshot()
+        return data[:, COL_VERSION] != versions
+
+    def select(self, mask: 'np.ndarray') -> List[int]:
+        """ID delle telecamere selezionate da una maschera bool per riga"""
+        return self.cam_ids[mask].tolist()
@@ -0,0 +1,286 @@
+"""
+Frame Capture - Stadio di cattura a produttore unico
+Un solo thread legge dal dispositivo video e pubblica i frame in un ring
+buffer con numero di sequenza e timestamp; rendering, tracciamento e
+streaming web leggono dal buffer senza contendersi il device.
+I frame vivono in un pool di buffer uint8 preallocati in cui cap.read()
+scrive direttamente: a regime nessuna allocazione per frame.
+"""
+
+import threading
+import time
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+class CapturedFrame:
+    """
+    Slot del pool: un buffer preallocato e il frame che contiene
+
+    L'immagine è condivisa tra tutti i consumatori: va trattata in sola
+    lettura. latest(), wait_newer() e get() restituiscono il frame con un
+    riferimento in più, da rilasciare con release() (o usando il frame come
+    context manager); finché è trattenuto il produttore non lo sovrascrive.
+    """
+    __slots__ = ("sequence", "timestamp", "image", "refs", "_buffer")
+
+    def __init__(self, buffer: 'FrameRingBuffer', image: Optional[np.ndarray] = None):
+        self.sequence = 0  # 0 = vuoto o in scrittura
+        self.timestamp = 0.0
+        self.image = image
+        self.refs = 0
+        self._buffer = buffer
+
+    def release(self):
+        """Rilascia il riferimento ottenuto dal ring buffer"""
+        self._buffer._release(self)
+
+    def __enter__(self) -> 'CapturedFrame':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FrameRingBuffer:
+    """
+    Pool fisso di slot con conteggio dei riferimenti
+
+    Il buffer tiene un riferimento sull'ultimo frame pubblicato; il produttore
+    scrive solo negli slot senza riferimenti, quindi un consumatore può
+    trattenere un frame per tutta l'elaborazione senza copiarlo.
+    """
+
+    def __init__(self, capacity: int = 4, shape: Optional[Tuple[int, ...]] = None):
+        """
+        Args:
+            capacity: Slot del pool (ultimo frame + frame trattenuti + uno in scrittura)
+            shape: Forma dei frame per preallocare (None = alla prima lettura)
+        """
+        self.capacity = capacity
+        self._slots: List[CapturedFrame] = [
+            CapturedFrame(self, np.empty(shape, dtype=np.uint8) if shape else None)
+            for _ in range(capacity)
+        ]
+        self._latest: Optional[CapturedFrame] = None
+        self._next_sequence = 1
+        self._condition = threading.Condition()
+
+    @property
+    def sequence(self) -> int:
+        """Sequenza dell'ultimo frame pubblicato (0 = nessuno)"""
+        latest = self._latest
+        return latest.sequence if latest is not None else 0
+
+    def acquire_write(self) -> Optional[CapturedFrame]:
+        """
+        Slot libero in cui il produttore può scrivere
+
+        Returns:
+            CapturedFrame: Slot riservato, o None se tutti sono trattenuti
+        """
+        with self._condition:
+            for slot in self._slots:
+                if slot.refs == 0:
+                    slot.refs = 1  # Riferimento del produttore, passa al buffer
+                    slot.sequence = 0  # Invalida il contenuto precedente per get()
+                    return slot
+        return None
+
+    def publish(self, slot: CapturedFrame, timestamp: Optional[float] = None):
+        """Pubblica lo slot scritto e risveglia i consumatori in attesa"""
+        with self._condition:
+            slot.sequence = self._next_sequence
+            self._next_sequence += 1
+            slot.timestamp = time.time() if timestamp is None else timestamp
+            previous = self._latest
+            self._latest = slot
+            if previous is not None:
+                previous.refs -= 1
+            self._condition.notify_all()
+
+    def abort_write(self, slot: CapturedFrame):
+        """Restituisce uno slot riservato ma non pubblicato"""
+        with self._condition:
+            slot.refs -= 1
+
+    def _retain_latest(self) -> Optional[CapturedFrame]:
+        """Ultimo frame con un riferimento in più (con il lock acquisito)"""
+        latest = self._latest
+        if latest is not None:
+            latest.refs += 1
+        return latest
+
+    def _release(self, frame: CapturedFrame):
+        with self._condition:
+            frame.refs -= 1
+
+    def latest(self) -> Optional[CapturedFrame]:
+        """Ultimo frame, trattenuto: chiamare release()"""
+        with self._condition:
+            return self._retain_latest()
+
+    def get(self, sequence: int) -> Optional[CapturedFrame]:
+        """Frame con la sequenza indicata se ancora nel pool, trattenuto"""
+        with self._condition:
+            for slot in self._slots:
+                if slot.sequence == sequence and sequence > 0:
+                    slot.refs += 1
+                    return slot
+        return None
+
+    def wait_newer(self, sequence: int, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """
+        Attende un frame più recente di sequence
+
+        Returns:
+            CapturedFrame: Ultimo frame trattenuto (chiamare release()),
+                o None se scade il timeout
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.sequence > sequence, timeout):
+                return None
+            return self._retain_latest()
+
+
+class FrameCapture:
+    """Unico lettore del dispositivo video: pubblica ogni frame nel ring buffer"""
+
+    def __init__(self, source: Union[int, str] = 0, width: Optional[int] = None,
+                 height: Optional[int] = None, fps: int = 30, capacity: int = 4,
+                 fallback_source: Optional[str] = "/dev/video0",
+                 reopen_interval: Optional[float] = None):
+        """
+        Args:
+            source: Indice o percorso del dispositivo
+            width, height: Risoluzione richiesta (None = default del device)
+            fps: Frame rate richiesto
+            capacity: Frame mantenuti nel ring buffer
+            fallback_source: Dispositivo da provare se source non si apre
+            reopen_interval: Secondi tra i tentativi di riapertura (None = mai)
+        """
+        self.source = source
+        self.fallback_source = fallback_source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.reopen_interval = reopen_interval
+        self.buffer = FrameRingBuffer(
+            capacity, (height, width, 3) if width and height else None
+        )
+        # Destinazione dei frame scartati quando tutti gli slot sono trattenuti
+        self._spare: Optional[np.ndarray] = None
+        self.dropped_frames = 0
+
+        self.cap: Optional[cv2.VideoCapture] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self) -> bool:
+        """Apre il dispositivo con fallback - PROTETTO"""
+        print("[CAPTURE] Inizializzazione webcam...")
+
+        cap = None
+        try:
+            cap = cv2.VideoCapture(self.source)
+            print(f"[CAPTURE] Tentativo VideoCapture({self.source})...")
+
+            if not cap.isOpened() and self.fallback_source is not None:
+                print(f"[CAPTURE] VideoCapture({self.source}) failed - tentando {self.fallback_source}...")
+                cap = cv2.VideoCapture(self.fallback_source)
+
+            if cap.isOpened():
+                # Ottimizza parametri capture
+                try:
+                    if self.width and self.height:
+                        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Riduce latenza
+                    cap.set(cv2.CAP_PROP_FPS, self.fps)
+
+                    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                    print(f"[CAPTURE] Webcam OK: {w}x{h}")
+                except Exception as e:
+                    print(f"[CAPTURE] Error setting camera properties: {e}")
+            else:
+                print("[CAPTURE] Nessuna webcam trovata - modalità simulazione")
+                cap = None
+
+        except Exception as e:
+            print(f"[CAPTURE] Exception in video capture init: {e}")
+            cap = None
+
+        self.cap = cap
+        return cap is not None
+
+    def start(self) -> bool:
+        """Apre il dispositivo e avvia il thread produttore"""
+        if self._thread is not None:
+            return self.is_opened()
+        opened = self.open()
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        return opened
+
+    def is_opened(self) -> bool:
+        cap = self.cap
+        return cap is not None and cap.isOpened()
+
+    def _capture_loop(self):
+        """Thread produttore: svuota il buffer hardware il più velocemente possibile"""
+        last_open = time.time()
+        while self._running:
+            if not self.is_opened():
+                if (self.reopen_interval is not None and
+                        time.time() - last_open > self.reopen_interval):
+                    last_open = time.time()
+                    self.open()
+                else:
+                    time.sleep(0.1)
+                continue
+            try:
+                slot = self.buffer.acquire_write()
+                if slot is None:
+                    # Consumatori troppo lenti: si svuota comunque il device
+                    _, self._spare = self.cap.read(image=self._spare)
+                    self.dropped_frames += 1
+                    continue
+                
+                # Scrittura diretta nel buffer dello slot; OpenCV rialloca solo
+                # se la forma non coincide (primo frame, cambio risoluzione)
+                ret, frame = self.cap.read(image=slot.image)
+                if ret and frame is not None and frame.size > 0:
+                    slot.image = frame
+                    self.buffer.publish(slot)
+                else:
+                    self.buffer.abort_write(slot)
+                    time.sleep(0.01)
+            except Exception as e:
+                print(f"[CAPTURE ERROR] {e}")
+                time.sleep(0.1)
+
+    def latest(self) -> Optional[CapturedFrame]:
+        """Ultimo frame catturato, trattenuto: chiamare release()"""
+        return self.buffer.latest()
+
+    def wait_newer(self, sequence: int, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """Attende un frame con sequenza maggiore di sequence (trattenuto: chiamare release())"""
+        return self.buffer.wait_newer(sequence, timeout)
+
+    def stop(self):
+        """Ferma il produttore e rilascia il dispositivo"""
+        self._running = False
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=0.5)
+        self._thread = None
+
+        try:
+            if self.cap is not None and self.cap.isOpened():
+                self.cap.release()
+        except Exception:
+            pass
+        self.cap = None
@@ -0,0 +1,122 @@
+"""
+Frame Scheduler - Cadenza del loop video a scadenze su clock monotono
+Ogni frame ha uno slot di 1/target_fps secondi: il loop parte all'arrivo del
+frame (mai prima dell'inizio dello slot), misura la durata di ogni stadio e
+dice se uno stadio sta nel tempo rimasto prima della scadenza, così il
+lavoro opzionale può essere alleggerito.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class FrameScheduler:
+    """
+    Scheduler a scadenze per un loop di elaborazione frame
+
+    Uso tipico:
+        scheduler.wait_for_slot()            # non prima dello slot successivo
+        frame = capture.wait_newer(seq, scheduler.time_until_deadline())
+        scheduler.begin_frame()
+        with scheduler.stage("zoom"):
+            fast = not scheduler.fits("zoom")  # versione economica se in ritardo
+            ...
+        scheduler.end_frame()
+    """
+
+    # Peso dei nuovi campioni nella media mobile esponenziale dei tempi
+    SMOOTHING = 0.1
+
+    def __init__(self, target_fps: float = 30.0):
+        """
+        Args:
+            target_fps: Frame rate massimo del loop
+        """
+        self.set_target_fps(target_fps)
+        self._next_slot = time.monotonic()
+        self._frame_start = self._next_slot
+        self._deadline = self._next_slot + self.frame_interval
+
+        # Tempi per stadio (secondi): ultimo campione e media mobile
+        self.last_timings: Dict[str, float] = {}
+        self._average: Dict[str, float] = {}
+
+        self.frames = 0
+        self.late_frames = 0
+
+    def set_target_fps(self, target_fps: float):
+        """Cambia il frame rate obiettivo (effettivo dallo slot successivo)"""
+        if target_fps <= 0:
+            raise ValueError("target_fps deve essere positivo")
+        self.target_fps = target_fps
+        self.frame_interval = 1.0 / target_fps
+
+    # --- Cadenza ---
+
+    def wait_for_slot(self):
+        """Attende l'inizio dello slot successivo (no-op se già in ritardo)"""
+        delay = self._next_slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def time_until_deadline(self, now: Optional[float] = None) -> float:
+        """Secondi alla scadenza dello slot successivo (0 se già scaduta)"""
+        if now is None:
+            now = time.monotonic()
+        return max(0.0, self._next_slot + self.frame_interval - now)
+
+    def begin_frame(self) -> float:
+        """
+        Inizia un frame: lo slot parte ora (all'arrivo del frame)
+
+        Returns:
+            float: Scadenza del frame sul clock monotono
+        """
+        now = time.monotonic()
+        self._frame_start = now
+        self._deadline = now + self.frame_interval
+        # Se in ritardo lo slot successivo si riallinea ad ora: nessuna raffica
+        # di frame per recuperare, latenza costante
+        self._next_slot = max(self._next_slot + self.frame_interval, now)
+        return self._deadline
+
+    def end_frame(self):
+        """Chiude il frame e aggiorna statistiche e tempo totale"""
+        now = time.monotonic()
+        self._record("frame", now - self._frame_start)
+        self.frames += 1
+        if now > self._deadline:
+            self.late_frames += 1
+
+    # --- Stadi ---
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Misura la durata di uno stadio del frame"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start)
+
+    def fits(self, name: str) -> bool:
+        """True se la durata media dello stadio sta nel tempo rimasto prima della scadenza"""
+        return self._deadline - time.monotonic() >= self._average.get(name, 0.0)
+
+    def _record(self, name: str, elapsed: float):
+        self.last_timings[name] = elapsed
+        average = self._average.get(name)
+        if average is None:
+            self._average[name] = elapsed
+        else:
+            self._average[name] = average + self.SMOOTHING * (elapsed - average)
+
+    def timings(self) -> Dict[str, float]:
+        """Durata media per stadio in millisecondi ("frame" = frame intero)"""
+        return {name: value * 1000.0 for name, value in self._average.items()}
+
+    @property
+    def behind(self) -> bool:
+        """True se il frame corrente ha superato la scadenza"""
+        return time.monotonic() > self._deadline
@@ -0,0 +1,200 @@
+"""
+JPEG Encoder - Backend intercambiabili per la codifica JPEG dello streaming
+OpenCV (sempre disponibile), libjpeg-turbo tramite PyTurboJPEG e l'encoder
+MJPEG di libavcodec tramite PyAV, questi ultimi solo se installati. Con
+"auto" un micro-benchmark all'avvio sceglie il backend più veloce tra quelli
+che producono un JPEG valido.
+"""
+
+import time
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import JPEG_ENCODER_BACKEND
+
+# PyTurboJPEG è opzionale: senza, il backend turbojpeg non è disponibile
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    HAS_TURBOJPEG = True
+except ImportError:
+    TurboJPEG = None
+    HAS_TURBOJPEG = False
+
+# PyAV è opzionale: senza, il backend pyav non è disponibile
+try:
+    import av
+    HAS_PYAV = True
+except ImportError:
+    av = None
+    HAS_PYAV = False
+
+# Marcatore di inizio immagine: il benchmark scarta i backend che non lo producono
+_JPEG_SOI = b"\xff\xd8"
+
+
+class JpegEncoder:
+    """
+    Interfaccia comune degli encoder
+
+    encode() riceve un'immagine BGR uint8 e restituisce i byte del JPEG
+    baseline (None se la codifica fallisce). Un'istanza per thread di
+    codifica: i backend possono tenere stato interno.
+    """
+
+    name = "base"
+
+    def encode(self, image: np.ndarray, quality: int) -> Optional[bytes]:
+        raise NotImplementedError
+
+
+class OpenCVJpegEncoder(JpegEncoder):
+    """cv2.imencode (libjpeg di OpenCV)"""
+
+    name = "opencv"
+
+    def encode(self, image: np.ndarray, quality: int) -> Optional[bytes]:
+        ret, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return jpeg.tobytes() if ret else None
+
+
+class TurboJpegEncoder(JpegEncoder):
+    """libjpeg-turbo tramite PyTurboJPEG, direttamente da BGR, sottocampionamento 4:2:0"""
+
+    name = "turbojpeg"
+
+    def __init__(self, lib_path: Optional[str] = None):
+        """
+        Args:
+            lib_path: Percorso della libreria libjpeg-turbo (None = ricerca automatica)
+        """
+        if not HAS_TURBOJPEG:
+            raise RuntimeError("PyTurboJPEG non installato")
+        self._jpeg = TurboJPEG(lib_path) if lib_path else TurboJPEG()
+
+    def encode(self, image: np.ndarray, quality: int) -> Optional[bytes]:
+        return self._jpeg.encode(image, quality=quality, pixel_format=TJPF_BGR,
+                                 jpeg_subsample=TJSAMP_420)
+
+
+class PyAVJpegEncoder(JpegEncoder):
+    """
+    Encoder MJPEG di libavcodec tramite PyAV
+
+    Un contesto aperto per ogni combinazione di dimensioni e qualità; la
+    qualità JPEG (1-100) è convertita nel quantizzatore fisso di ffmpeg (2-31).
+    """
+
+    name = "pyav"
+
+    def __init__(self):
+        if not HAS_PYAV:
+            raise RuntimeError("PyAV non installato")
+        self._contexts: Dict[Tuple[int, int, int], "av.CodecContext"] = {}
+
+    @staticmethod
+    def _quantizer(quality: int) -> int:
+        return int(round(2 + (100 - min(max(quality, 1), 100)) * 29 / 99))
+
+    def _context(self, width: int, height: int, quality: int):
+        key = (width, height, quality)
+        context = self._contexts.get(key)
+        if context is None:
+            q = str(self._quantizer(quality))
+            context = av.CodecContext.create("mjpeg", "w")
+            context.width = width
+            context.height = height
+            context.pix_fmt = "yuvj420p"
+            context.time_base = Fraction(1, 30)
+            context.options = {"qmin": q, "qmax": q}
+            self._contexts[key] = context
+        return context
+
+    def encode(self, image: np.ndarray, quality: int) -> Optional[bytes]:
+        height, width = image.shape[:2]
+        context = self._context(width, height, quality)
+        frame = av.VideoFrame.from_ndarray(image, format="bgr24").reformat(format="yuvj420p")
+        packets = context.encode(frame)
+        return bytes(packets[0]) if packets else None
+
+
+# Backend in ordine di preferenza a parità di tempo
+ENCODER_BACKENDS = {
+    "turbojpeg": TurboJpegEncoder,
+    "pyav": PyAVJpegEncoder,
+    "opencv": OpenCVJpegEncoder,
+}
+
+
+def _benchmark_image(size: Tuple[int, int]) -> np.ndarray:
+    """Immagine di prova con gradienti e rumore (deterministica, simile a un frame reale)"""
+    width, height = size
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    noise = np.random.default_rng(0).integers(0, 32, (height, width, 3), dtype=np.uint8)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[..., 0] = x
+    image[..., 1] = y
+    image[..., 2] = (x + y) / 2
+    return cv2.add(image, noise)
+
+
+def benchmark_encoder(encoder: JpegEncoder, image: np.ndarray, quality: int = 75,
+                      rounds: int = 10) -> Optional[float]:
+    """
+    Tempo medio di codifica in secondi
+
+    Returns:
+        float: Secondi per frame, o None se il backend non produce un JPEG valido
+    """
+    data = encoder.encode(image, quality)  # Riscaldamento (contesti, tabelle)
+    if not data or not data.startswith(_JPEG_SOI):
+        return None
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encoder.encode(image, quality)
+    return (time.perf_counter() - start) / rounds
+
+
+def create_jpeg_encoder(backend: str = JPEG_ENCODER_BACKEND,
+                        sample_size: Tuple[int, int] = (640, 480)) -> JpegEncoder:
+    """
+    Crea l'encoder configurato
+
+    Args:
+        backend: "auto" (il più veloce al benchmark tra quelli disponibili),
+            "turbojpeg", "pyav" o "opencv"
+        sample_size: Dimensioni (w, h) dell'immagine di prova del benchmark
+
+    Returns:
+        JpegEncoder: Encoder pronto (OpenCV se nessun altro è disponibile)
+    """
+    names: List[str] = list(ENCODER_BACKENDS) if backend == "auto" else [backend]
+    image = _benchmark_image(sample_size)
+    best: Optional[JpegEncoder] = None
+    best_time = float("inf")
+    for name in names:
+        encoder_class = ENCODER_BACKENDS.get(name)
+        if encoder_class is None:
+            print(f"[JPEG] Backend sconosciuto: {name}")
+            continue
+        try:
+            encoder = encoder_class()
+            elapsed = benchmark_encoder(encoder, image)
+        except Exception as e:
+            print(f"[JPEG] Backend {name} non disponibile: {e}")
+            continue
+        if elapsed is None:
+            print(f"[JPEG] Backend {name} scartato: JPEG non valido")
+            continue
+        print(f"[JPEG] {name}: {elapsed * 1000:.2f} ms/frame a {sample_size[0]}x{sample_size[1]}")
+        if elapsed < best_time:
+            best, best_time = encoder, elapsed
+
+    if best is None:
+        print("[JPEG] Nessun backend richiesto disponibile, uso opencv")
+        return OpenCVJpegEncoder()
+    print(f"[JPEG] Encoder selezionato: {best.name}")
+    return best
@@ -13,6 +13,7 @@ from PyQt6.QtGui import QImage, QPixmap, QMouseEvent, QFont
 from PyQt6.QtCore import Qt, QTimer
 from config import MODE_MANUAL, MODE_SCAN, MODE_TRACK, MODE_NAMES
 
+from visca_protocol_reference import pan_tilt_drive
 from config import (
     DEFAULT_SERVER_IP, WINDOW_WIDTH, WINDOW_HEIGHT, VIDEO_WIDTH, VIDEO_HEIGHT,
     DRAG_CMD_SENSITIVITY
@@ -70,6 +71,7 @@ class MainWindow(QMainWindow):
         
         # Setup video thread
         self.th = VideoThread(self.visca)
+        self._shown_sequence = 0  # Ultimo frame mostrato
         # NON connettere signal - useremo polling invece (evita crash Wayland)
         # self.th.change_pixmap_signal.connect(self.update_image)
         self.lbl.on_drag_signal.connect(self.handle_drag_input)
@@ -83,7 +85,8 @@ class MainWindow(QMainWindow):
         # Timer per polling frame dal video thread
         self.frame_timer = QTimer()
         self.frame_timer.timeout.connect(self._poll_and_update_frame)
-        self.frame_timer.start(33)  # ~30 FPS
+        # Stessa cadenza del loop video: i poll senza frame nuovi costano un confronto
+        self.frame_timer.start(max(1, int(self.th.scheduler.frame_interval * 1000)))
         
         # Status bar
         self.statusBar().showMessage("Ready - Camera 1 selected")
@@ -229,10 +232,18 @@ class MainWindow(QMainWindow):
         if self.th is None:
             return
         
-        # Prova a recuperare il frame più recente
-        frame = self.th.get_latest_frame()
-        if frame is not None:
-            self.update_image(frame)
+        # Stesso frame del poll precedente: nessuna conversione
+        if self.th.display_buffer.sequence == self._shown_sequence:
+            return
+        
+        # Prova a recuperare il frame più recente (trattenuto: il thread video
+        # non lo sovrascrive finché la QImage che lo avvolge è in uso)
+        frame = self.th.latest_display_frame()
+        if frame is None:
+            return
+        with frame:
+            self._shown_sequence = frame.sequence
+            self.update_image(self.th.wrap_frame(frame.image))
 
     def update_image(self, img: QImage):
         """
@@ -260,10 +271,7 @@ class MainWindow(QMainWindow):
         
         # Invia comando pan/tilt solo se c'è movimento
         if self.th.cmd_p != 0 or self.th.cmd_t != 0:
-            pan_dir = "01" if self.th.cmd_p < 0 else ("02" if self.th.cmd_p > 0 else "03")
-            tilt_dir = "01" if self.th.cmd_t < 0 else ("02" if self.th.cmd_t > 0 else "03")
-            
-            pan_tilt_hex = f"0106010505{pan_dir}{tilt_dir}FF"
+            pan_tilt_hex = pan_tilt_drive(self.th.cmd_p, self.th.cmd_t)
             
             # Invia e controlla errore
             error_msg = self.visca.send(cid, pan_tilt_hex, retry=False)
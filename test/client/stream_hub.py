@@ -0,0 +1,387 @@
+"""
+Stream Hub - Un produttore, molti spettatori, più rendizioni
+Un solo thread cattura, elabora e codifica ogni frame e pubblica l'ultimo
+JPEG di ogni rendizione (risoluzione e qualità) nel suo hub; ogni spettatore
+legge l'ultimo frame disponibile con il proprio ritmo. Chi è lento salta
+frame invece di rallentare il produttore, e la codifica di una rendizione si
+paga una volta per frame qualunque sia il numero di client. Le rendizioni
+senza spettatori non vengono codificate.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class Rendition:
+    """Una variante dello stream: dimensioni di uscita e qualità JPEG"""
+    name: str
+    width: int
+    height: int
+    quality: int
+
+
+class EncodedFrame:
+    """Frame codificato pubblicato dall'hub (immutabile, condivisibile senza copie)"""
+    __slots__ = ("sequence", "timestamp", "data", "rendition")
+
+    def __init__(self, sequence: int, timestamp: float, data: bytes,
+                 rendition: Optional[str] = None):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.data = data
+        self.rendition = rendition  # Nome della rendizione dell'hub
+
+
+def _resolve_waiters(futures: List[asyncio.Future]):
+    """Risveglia gli spettatori asyncio (nel thread del loop)"""
+    for future in futures:
+        if not future.done():
+            future.set_result(None)
+
+
+class BroadcastHub:
+    """
+    Ultimo frame codificato di una rendizione, condiviso tra gli spettatori
+
+    L'hub non produce frame: on_subscribe viene chiamato a ogni nuovo
+    spettatore, così il produttore può partire su richiesta.
+    """
+
+    WAIT_TIMEOUT = 1.0  # Attesa massima di un frame per uno spettatore
+
+    def __init__(self, name: str = "stream", on_subscribe: Optional[Callable[[], None]] = None,
+                 rendition: Optional[str] = None):
+        """
+        Args:
+            name: Nome per i log
+            on_subscribe: Chiamato all'arrivo di ogni spettatore
+            rendition: Nome della rendizione, riportato nei frame pubblicati
+        """
+        self.name = name
+        self.on_subscribe = on_subscribe
+        self.rendition = rendition
+
+        self._latest: Optional[EncodedFrame] = None
+        self._next_sequence = 1
+        self._condition = threading.Condition()
+        self._subscribers = 0
+        # Spettatori asyncio in attesa, per event loop: un solo risveglio per loop
+        self._async_waiters: Dict[asyncio.AbstractEventLoop, List[asyncio.Future]] = {}
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def latest(self) -> Optional[EncodedFrame]:
+        """Ultimo frame pubblicato"""
+        return self._latest
+
+    def publish(self, data: bytes, timestamp: Optional[float] = None):
+        """Sostituisce l'ultimo frame e risveglia gli spettatori"""
+        with self._condition:
+            self._latest = EncodedFrame(
+                self._next_sequence, time.time() if timestamp is None else timestamp, data,
+                self.rendition
+            )
+            self._next_sequence += 1
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, {}
+        for loop, futures in waiters.items():
+            try:
+                loop.call_soon_threadsafe(_resolve_waiters, futures)
+            except RuntimeError:
+                pass  # Event loop chiuso
+
+    def clear(self):
+        """Dimentica l'ultimo frame (al riavvio del produttore niente frame vecchi)"""
+        with self._condition:
+            self._latest = None
+
+    def wait_newer(self, sequence: int, timeout: Optional[float] = None) -> Optional[EncodedFrame]:
+        """Attende un frame più recente di sequence (None se scade il timeout)"""
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self._latest is not None and self._latest.sequence > sequence, timeout):
+                return None
+            return self._latest
+
+    async def wait_newer_async(self, sequence: int,
+                               timeout: Optional[float] = None) -> Optional[EncodedFrame]:
+        """Come wait_newer(), senza bloccare l'event loop"""
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            latest = self._latest
+            if latest is not None and latest.sequence > sequence:
+                return latest
+            future = loop.create_future()
+            self._async_waiters.setdefault(loop, []).append(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, TimeoutError):
+            return None
+        finally:
+            if not future.done() or future.cancelled():
+                self._discard_waiter(loop, future)
+        latest = self._latest
+        return latest if latest is not None and latest.sequence > sequence else None
+
+    def _discard_waiter(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        """Toglie un'attesa scaduta o annullata (publish() non l'ha ancora presa)"""
+        with self._condition:
+            futures = self._async_waiters.get(loop)
+            if futures is None:
+                return
+            try:
+                futures.remove(future)
+            except ValueError:
+                return
+            if not futures:
+                del self._async_waiters[loop]
+
+    def frames(self) -> Iterator[EncodedFrame]:
+        """
+        Frame per uno spettatore, dal più recente in poi
+
+        Finché il generatore è vivo conta come spettatore; i frame arrivati
+        mentre lo spettatore era occupato vengono saltati.
+        """
+        self._add_subscriber()
+        try:
+            sequence = 0
+            while True:
+                frame = self.wait_newer(sequence, self.WAIT_TIMEOUT)
+                if frame is None:
+                    continue
+                sequence = frame.sequence
+                yield frame
+        finally:
+            self._remove_subscriber()
+
+    async def aframes(self) -> AsyncIterator[EncodedFrame]:
+        """Come frames(), per un event loop asyncio: nessun thread per spettatore"""
+        self._add_subscriber()
+        try:
+            sequence = 0
+            while True:
+                frame = await self.wait_newer_async(sequence, self.WAIT_TIMEOUT)
+                if frame is None:
+                    continue
+                sequence = frame.sequence
+                yield frame
+        finally:
+            self._remove_subscriber()
+
+    def _add_subscriber(self):
+        with self._condition:
+            self._subscribers += 1
+        if self.on_subscribe is not None:
+            self.on_subscribe()
+
+    def _remove_subscriber(self):
+        with self._condition:
+            self._subscribers -= 1
+
+
+class RenditionLadder:
+    """
+    Rendizioni di una sorgente, un hub ciascuna, con un solo produttore
+
+    Il thread produttore parte al primo spettatore e si ferma dopo
+    IDLE_TIMEOUT secondi senza spettatori, così una sorgente non guardata non
+    consuma CPU. A ogni giro render() riceve le sole rendizioni guardate e
+    restituisce il JPEG di ciascuna.
+    """
+
+    IDLE_TIMEOUT = 5.0
+
+    # Adattamento automatico: frazione di frame saltati da un client in una
+    # finestra di ADAPT_WINDOW frame consegnati
+    ADAPT_WINDOW = 30
+    DROP_DOWN = 0.3  # Oltre: rendizione più leggera
+    DROP_UP = 0.05   # Sotto, per UP_WINDOWS finestre di fila: rendizione più pesante
+    UP_WINDOWS = 2
+    MAX_UP_WINDOWS = 32  # Tetto del backoff dopo una salita fallita
+
+    def __init__(self, render: Callable[[List[Rendition]], Dict[str, bytes]],
+                 renditions: List[Rendition], name: str = "stream"):
+        """
+        Args:
+            render: Produce i frame codificati delle rendizioni indicate
+                (bloccante fino al frame successivo della sorgente; dizionario
+                vuoto = nessun frame)
+            renditions: Rendizioni dalla più pesante alla più leggera
+            name: Nome per log e thread
+        """
+        if not renditions:
+            raise ValueError("Serve almeno una rendizione")
+        self.render = render
+        self.renditions = list(renditions)
+        self.name = name
+        self.hubs: Dict[str, BroadcastHub] = {
+            r.name: BroadcastHub(f"{name}-{r.name}", on_subscribe=self._ensure_running,
+                                 rendition=r.name)
+            for r in self.renditions
+        }
+
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.frames_encoded = 0
+
+    def hub(self, name: Optional[str] = None) -> BroadcastHub:
+        """Hub di una rendizione (None = la più pesante)"""
+        if name is None:
+            return self.hubs[self.renditions[0].name]
+        hub = self.hubs.get(name)
+        if hub is None:
+            raise KeyError(f"Rendizione sconosciuta: {name}")
+        return hub
+
+    @property
+    def subscribers(self) -> int:
+        return sum(hub.subscribers for hub in self.hubs.values())
+
+    def adaptive_frames(self, start: Optional[str] = None) -> Iterator[EncodedFrame]:
+        """
+        Frame per uno spettatore con scelta automatica della rendizione
+
+        La banda del client è stimata dai frame che salta: il produttore non
+        aspetta nessuno, quindi un client che non riesce a scaricare una
+        rendizione al ritmo della sorgente ne perde una parte. Oltre DROP_DOWN
+        si scende di un gradino; sotto DROP_UP per UP_WINDOWS finestre si
+        risale, con un'attesa che raddoppia se la salita non regge.
+        """
+        selector = _RenditionSelector(self, start)
+        while True:
+            frames = self.hubs[selector.name].frames()
+            try:
+                for frame in frames:
+                    yield frame
+                    if selector.observe(frame):
+                        break
+            finally:
+                frames.close()
+
+    async def adaptive_aframes(self, start: Optional[str] = None) -> AsyncIterator[EncodedFrame]:
+        """Come adaptive_frames(), per un event loop asyncio"""
+        selector = _RenditionSelector(self, start)
+        while True:
+            frames = self.hubs[selector.name].aframes()
+            try:
+                async for frame in frames:
+                    yield frame
+                    if selector.observe(frame):
+                        break
+            finally:
+                await frames.aclose()
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._producer_loop, name=f"{self.name}-producer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Ferma il produttore"""
+        self._running = False
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def _producer_loop(self):
+        print(f"[STREAM] {self.name}: produttore avviato")
+        idle_since = time.monotonic()
+        while self._running:
+            active = [r for r in self.renditions if self.hubs[r.name].subscribers > 0]
+            if not active:
+                with self._lock:
+                    if self.subscribers == 0 and time.monotonic() - idle_since > self.IDLE_TIMEOUT:
+                        self._running = False
+                        for hub in self.hubs.values():
+                            hub.clear()
+                        break
+                time.sleep(0.05)
+                continue
+            idle_since = time.monotonic()
+
+            try:
+                encoded = self.render(active)
+            except Exception as e:
+                print(f"[STREAM ERROR] {self.name}: {e}")
+                time.sleep(0.1)
+                continue
+            if not encoded:
+                time.sleep(0.05)
+                continue
+            timestamp = time.time()
+            for name, data in encoded.items():
+                self.hubs[name].publish(data, timestamp)
+            self.frames_encoded += 1
+        print(f"[STREAM] {self.name}: produttore fermo (nessuno spettatore)")
+
+
+class _RenditionSelector:
+    """Stato dell'adattamento automatico della rendizione di uno spettatore"""
+
+    def __init__(self, ladder: RenditionLadder, start: Optional[str]):
+        self._ladder = ladder
+        self._names = [r.name for r in ladder.renditions]
+        self.level = self._names.index(start) if start in self._names else 0
+        self._up_windows = ladder.UP_WINDOWS
+        self._clean_windows = 0
+        self._just_raised = False
+        self._delivered = self._dropped = 0
+        self._sequence = 0
+
+    @property
+    def name(self) -> str:
+        return self._names[self.level]
+
+    def observe(self, frame: EncodedFrame) -> bool:
+        """
+        Conta un frame consegnato
+
+        Returns:
+            bool: True se lo spettatore deve passare alla rendizione name
+        """
+        ladder = self._ladder
+        if self._sequence:
+            self._dropped += frame.sequence - self._sequence - 1
+        self._sequence = frame.sequence
+        self._delivered += 1
+        if self._delivered < ladder.ADAPT_WINDOW:
+            return False
+
+        ratio = self._dropped / (self._delivered + self._dropped)
+        self._delivered = self._dropped = 0
+        level = self.level
+        if ratio > ladder.DROP_DOWN and level < len(self._names) - 1:
+            if self._just_raised:
+                self._up_windows = min(self._up_windows * 2, ladder.MAX_UP_WINDOWS)
+            level += 1
+        elif ratio < ladder.DROP_UP and level > 0:
+            self._clean_windows += 1
+            if self._clean_windows >= self._up_windows:
+                level -= 1
+        else:
+            self._clean_windows = 0
+        self._just_raised = False
+        if level == self.level:
+            return False
+
+        print(f"[STREAM] {ladder.name}: rendizione {self.name} -> {self._names[level]}")
+        # Le sequenze sono per hub: il conteggio riparte sulla nuova rendizione
+        self._just_raised = level < self.level
+        self._clean_windows = 0
+        self._sequence = 0
+        self.level = level
+        return True
@@ -5,11 +5,16 @@ import cv2
 import numpy as np
 from typing import Optional, Dict
 from dataclasses import dataclass
-import threading
-from queue import Queue
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtGui import QImage
 from visca_controller import ViscaController
+from visca_protocol_reference import pan_tilt_drive
+from frame_capture import FrameCapture, FrameRingBuffer, CapturedFrame
+from frame_scheduler import FrameScheduler
+from face_detector import FaceDetector, create_face_detector
+from face_tracker import FaceTracker
+from detection_worker import DetectionWorkerPool
+from digital_ptz import DigitalPTZ, QUALITY_BALANCED, QUALITY_FAST, smooth_damp
 from config import (
     MODE_MANUAL, MODE_SCAN, MODE_TRACK, MODE_NAMES,
     COLOR_MANUAL, COLOR_SCAN, COLOR_TRACK, 
@@ -31,27 +36,39 @@ class VideoThread(QThread):
     change_pixmap_signal = pyqtSignal(QImage)
 
     # Configurazione interpolazione ottimizzata
-    INTERPOLATION_SPEED = 0.65  # Più veloce = meno lag
+    SMOOTHING_TIME = 0.05  # Costante di tempo (s) del movimento display: più bassa = meno lag
     SYNC_INTERVAL = 0.04  # 25 Hz sincronizzazione
-    TARGET_FPS = 60
+    AUTO_STATE_MAX_AGE = 0.15  # Freschezza dello stato in SCAN/TRACK
+    TARGET_FPS = 60  # Tetto del loop: sotto, il ritmo lo danno i frame in arrivo
     FRAME_TIME = 1.0 / TARGET_FPS
+    FRAME_WAIT_TIMEOUT = 0.1  # Oltre, si mostra il frame di debug
+    DISPLAY_BUFFERS = 3  # Frame mostrato dalla GUI + ultimo pubblicato + in scrittura
+    DETECTION_WORKERS = 1  # Thread di tracciamento condivisi dalle telecamere in TRACK
     
     # Soglie per movimenti significativi
     MIN_MOVEMENT_THRESHOLD = 15  # pixels per face tracking
     
-    def __init__(self, visca_controller: ViscaController):
+    def __init__(self, visca_controller: ViscaController,
+                 capture: Optional[FrameCapture] = None):
+        """
+        Args:
+            visca_controller: Controller VISCA
+            capture: Stadio di cattura condiviso; se None ne viene creato uno proprio
+        """
         super().__init__()
         self.visca_controller = visca_controller
         self._run_flag = True
         
-        # --- Sistema di cattura asincrona sicuro ---
-        self.frame_lock = threading.Lock()
-        self.latest_raw_frame = None
-        self.capture_running = True
-        self.cap = None # Inizializza prima
+        # --- Cattura: unico lettore del device, frame dal ring buffer ---
+        self._owns_capture = capture is None
+        # (uno slot in più per ogni worker di detection che trattiene un frame)
+        self.capture = capture if capture is not None else FrameCapture(
+            0, fps=30, capacity=4 + self.DETECTION_WORKERS
+        )
         
-        # --- Coda thread-safe per frame (alternativa ai signals) ---
-        self.frame_queue = Queue(maxsize=2)  # Keep only 2 latest frames
+        # --- Frame pronti per la GUI (alternativa ai signals) ---
+        # La GUI li legge per polling direttamente dai buffer, senza copie
+        self.display_buffer = FrameRingBuffer(self.DISPLAY_BUFFERS)
         # ------------------------------------------
 
         self.active_cam_id = 1
@@ -71,88 +88,50 @@ class VideoThread(QThread):
         self.last_scan_time = {i: 0.0 for i in range(1, 7)}
         self.last_track_time = {i: 0.0 for i in range(1, 7)}
         self.last_manual_input_time = 0
+        # Sottoscrizione allo stato della sola telecamera attiva
+        self._state_subscription = None
+        self._synced_version = {i: -1 for i in range(1, 7)}
         
-        self.face_cascade: Optional[cv2.CascadeClassifier] = None
+        self.face_detector: Optional[FaceDetector] = None
+        self.detection_pool: Optional[DetectionWorkerPool] = None
+        self._last_faces = []  # Ultimi volti rilevati in TRACK, per draw_faces
         self._init_face_detection()
         
-        # Fondamentale: apri la camera PRIMA di far partire il thread di lettura
-        self.cap = self._init_video_capture()
-        
-        # Ora avvia il thread di lettura
-        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
-        self.capture_thread.start()
+        # Apre il device e avvia il produttore (no-op se già avviato)
+        self.capture.start()
+        if self.detection_pool is not None:
+            self.detection_pool.start()
         
         self.frame_count = 0
         self.fps_start_time = time.time()
         self.current_fps = 0.0
-    def _capture_loop(self):
-        """Thread secondario: svuota il buffer hardware il più velocemente possibile"""
-        while self.capture_running:
-            if self.cap is not None and self.cap.isOpened():
-                try:
-                    ret, frame = self.cap.read()
-                    if ret and frame is not None:
-                        # Operazione atomica: proteggiamo la scrittura del frame
-                        with self.frame_lock:
-                            # .copy() qui è essenziale per disconnettere la memoria
-                            # dal buffer interno di OpenCV
-                            self.latest_raw_frame = frame.copy()
-                    else:
-                        time.sleep(0.01)
-                except Exception as e:
-                    print(f"[CAPTURE ERROR] {e}")
-                    time.sleep(0.1)
-            else:
-                time.sleep(0.1)
+        
+        # Zoom digitale (buffer di uscita = buffer di display passato a digital_zoom):
+        # interpolazione lineare anche in movimento per il posizionamento sub-pixel,
+        # nearest solo quando lo stadio zoom non sta nel tempo rimasto
+        self.ptz = DigitalPTZ(moving_quality=QUALITY_BALANCED)
+        
+        # Velocità (zoom, pan, tilt) per telecamera dello smorzamento del display
+        self._display_velocity = {i: [0.0, 0.0, 0.0] for i in range(1, 7)}
+        self._last_interpolation = time.monotonic()
+        
+        # Cadenza a scadenze e tempi per stadio del loop
+        self.scheduler = FrameScheduler(self.TARGET_FPS)
     def _init_face_detection(self):
-        """Inizializza face detection con fallback"""
+        """Inizializza face detection con fallback (backend da config.py)"""
         try:
-            # Carica il classificatore Haar Cascade per il rilevamento dei volti
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-            
-            if self.face_cascade.empty():
-                print("[INIT] Haar Cascade file not found - Face detection disabled")
-                self.face_cascade = None
-            else:
-                print(f"[INIT] Face detection enabled - using {cascade_path}")
+            self.face_detector = create_face_detector()
+            if self.face_detector is not None:
+                # Detect-then-track fuori dal loop di rendering: un tracker (e un
+                # detector, i buffer non sono condivisibili) per telecamera
+                detector_class = type(self.face_detector)
+                self.detection_pool = DetectionWorkerPool(
+                    self.capture, lambda cid: FaceTracker(detector_class()),
+                    self.DETECTION_WORKERS
+                )
         except Exception as e:
             print(f"[INIT] Face detection init error: {e}")
-            self.face_cascade = None
-
-    def _init_video_capture(self) -> cv2.VideoCapture:
-        """Inizializza video capture con fallback - PROTETTO"""
-        print("[INIT] Inizializzazione webcam...")
-        
-        cap = None
-        try:
-            cap = cv2.VideoCapture(0)
-            print("[INIT] Tentativo VideoCapture(0)...")
-            
-            if not cap.isOpened():
-                print("[INIT] VideoCapture(0) failed - tentando /dev/video0...")
-                cap = cv2.VideoCapture("/dev/video0")
-            
-            if cap.isOpened():
-                # Ottimizza parametri capture
-                try:
-                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Riduce latenza
-                    cap.set(cv2.CAP_PROP_FPS, 30)
-                    
-                    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    print(f"[INIT] Webcam OK: {w}x{h}")
-                except Exception as e:
-                    print(f"[INIT] Error setting camera properties: {e}")
-            else:
-                print("[INIT] Nessuna webcam trovata - modalità simulazione")
-                cap = None
-                
-        except Exception as e:
-            print(f"[INIT] Exception in video capture init: {e}")
-            cap = None
-        
-        return cap
+            self.face_detector = None
 
     def run(self):
         """Loop principale QThread - PROTETTO DA SEGFAULT"""
@@ -161,25 +140,42 @@ class VideoThread(QThread):
         frame_count = 0
         consecutive_errors = 0
         MAX_CONSECUTIVE_ERRORS = 10
+        last_sequence = 0
+        captured = None
         
         # Delay iniziale per dare tempo all'UI di inizializzarsi
         time.sleep(1.0)
         print("[RUN] Inizio emissione frame...")
         
+        scheduler = self.scheduler
+        
         while self._run_flag:
             try:
-                # Prova a recuperare frame dalla webcam PRIMA
                 debug_frame = None
+                # Rilascia lo slot dell'iterazione precedente al produttore
+                if captured is not None:
+                    captured.release()
+                    captured = None
                 
+                # Mai prima dello slot successivo (tetto TARGET_FPS); poi il
+                # frame si prende appena il produttore lo pubblica
+                scheduler.wait_for_slot()
+                
+                # Prova a recuperare frame dalla webcam PRIMA
                 try:
-                    if self.cap is not None and self.cap.isOpened():
-                        ret, frame = self.cap.read()
-                        if ret and frame is not None and frame.size > 0:
-                            debug_frame = frame
+                    with scheduler.stage("capture"):
+                        if self.capture.is_opened():
+                            captured = self.capture.wait_newer(last_sequence, self.FRAME_WAIT_TIMEOUT)
+                            if captured is not None:
+                                last_sequence = captured.sequence
+                                debug_frame = captured.image
                 except Exception as cap_err:
                     print(f"[RUN] Camera read error: {cap_err}")
                     debug_frame = None
                 
+                # La scadenza del frame parte dal suo arrivo
+                scheduler.begin_frame()
+                
                 # Se non c'è frame dalla camera, crea uno di debug
                 if debug_frame is None:
                     try:
@@ -207,24 +203,30 @@ class VideoThread(QThread):
                 
                 # Aggiorna logica dei comandi (pan/tilt/zoom)
                 try:
-                    self._process_camera_commands()
+                    with scheduler.stage("commands"):
+                        self._process_camera_commands()
                 except Exception as cmd_err:
                     print(f"[RUN] Camera command error: {cmd_err}")
                 
                 # Sincronizza lo stato dal backend VISCA (essenziale per SCAN/TRACK)
                 try:
-                    self._sync_state_from_backend()
+                    with scheduler.stage("sync"):
+                        self._sync_state_from_backend()
                 except Exception as sync_err:
                     print(f"[RUN] Sync error: {sync_err}")
                 
-                # Processa modalità TRACK se attiva
+                # Processa modalità TRACK se attiva: la detection gira nel pool
+                # (telecamere in TRACK), qui si usa solo l'ultimo risultato
                 try:
                     cid = self.active_cam_id
                     mode = self.cam_modes[cid]
+                    if self.detection_pool is not None:
+                        self.detection_pool.set_cameras(
+                            c for c, m in self.cam_modes.items() if m == MODE_TRACK
+                        )
                     if mode == MODE_TRACK:
-                        # Recupera frame dalla webcam per face detection
-                        frame_for_tracking = self._capture_frame()
-                        self._process_track_mode(frame_for_tracking, cid)
+                        with scheduler.stage("track"):
+                            self._process_track_mode(debug_frame, cid)
                 except Exception as track_err:
                     print(f"[RUN] Track mode error: {track_err}")
                 
@@ -235,24 +237,35 @@ class VideoThread(QThread):
                     print(f"[RUN] Interpolation error: {interp_err}")
                 
                 # Applica elaborazioni al frame (zoom digitale, pan, tilt)
-                try:
-                    cid = self.active_cam_id
-                    
-                    # Applica zoom digitale
-                    processed_frame = self.digital_zoom(debug_frame, cid)
+                # direttamente in un buffer di display libero (nessuno lo sta mostrando)
+                display = self._acquire_display_slot(debug_frame)
+                if display is not None:
+                    try:
+                        cid = self.active_cam_id
+                        
+                        # Applica zoom digitale nel buffer di display
+                        with scheduler.stage("zoom"):
+                            processed_frame = self.digital_zoom(debug_frame, cid, out=display.image)
+                            
+                            # Senza zoom il frame è quello del ring buffer, condiviso con
+                            # gli altri consumatori: l'OSD va disegnato sul buffer di display
+                            if processed_frame is not display.image:
+                                np.copyto(display.image, processed_frame)
+                        
+                        # Disegna OSD (On-Screen Display)
+                        with scheduler.stage("osd"):
+                            self.draw_osd(display.image, cid)
+                    except Exception as proc_err:
+                        print(f"[RUN] Frame processing error: {proc_err}")
+                        np.copyto(display.image, debug_frame)
                     
-                    # Disegna OSD (On-Screen Display)
-                    self.draw_osd(processed_frame, cid)
-                except Exception as proc_err:
-                    print(f"[RUN] Frame processing error: {proc_err}")
-                    processed_frame = debug_frame
-                
-                # Prova a emettere il frame CON protezione
-                try:
-                    self._emit_frame(processed_frame)
-                except Exception as emit_err:
-                    print(f"[RUN] Emit error: {emit_err}")
-                    consecutive_errors += 1
+                    # Pubblica il frame per la GUI CON protezione
+                    try:
+                        with scheduler.stage("emit"):
+                            self._emit_frame(display)
+                    except Exception as emit_err:
+                        print(f"[RUN] Emit error: {emit_err}")
+                        consecutive_errors += 1
                 
                 # Aggiorna FPS counter
                 try:
@@ -260,8 +273,7 @@ class VideoThread(QThread):
                 except Exception as fps_err:
                     print(f"[RUN] FPS counter error: {fps_err}")
                 
-                # Piccolo sleep per non bruciare CPU
-                time.sleep(0.033)  # ~30 FPS
+                scheduler.end_frame()
                 
             except Exception as e:
                 print(f"[RUN ERROR] Unexpected error: {e}")
@@ -270,49 +282,64 @@ class VideoThread(QThread):
                     print("[RUN] Stopping thread due to repeated errors")
                     break
                 time.sleep(0.1)
+        
+        if captured is not None:
+            captured.release()
+    def latest_display_frame(self) -> Optional[CapturedFrame]:
+        """
+        Ultimo frame elaborato (BGR, OSD incluso), trattenuto: chiamare release()
+
+        Usare wrap_frame() per mostrarlo senza copie finché è trattenuto.
+        """
+        return self.display_buffer.latest()
+
+    @staticmethod
+    def wrap_frame(image: np.ndarray) -> QImage:
+        """
+        QImage BGR888 che punta direttamente alla memoria del frame (nessuna copia)
+
+        La QImage non possiede i dati: il frame deve restare trattenuto finché
+        la QImage è in uso (es. fino a QPixmap.fromImage, che copia).
+        """
+        h, w = image.shape[:2]
+        return QImage(image.data, w, h, image.strides[0], QImage.Format.Format_BGR888)
+
     def get_latest_frame(self) -> Optional[QImage]:
-        """Recupera il frame più recente dalla coda (thread-safe)"""
-        try:
-            # Non bloccare - solo prova a leggere
-            return self.frame_queue.get_nowait()
-        except:
+        """Copia autonoma dell'ultimo frame elaborato come QImage (thread-safe)"""
+        frame = self.latest_display_frame()
+        if frame is None:
             return None
+        with frame:
+            return self.wrap_frame(frame.image).copy()
 
-    def _capture_frame(self) -> np.ndarray:
-        """Recupera l'ultimo frame in modo thread-safe"""
-        with self.frame_lock:
-            if self.latest_raw_frame is not None:
-                # Restituiamo una copia per evitare che il thread di cattura 
-                # sovrascriva mentre facciamo face detection
-                return self.latest_raw_frame.copy()
-        
-        # Fallback: se non c'è ancora un frame, creiamo una matrice nera
-        return np.zeros((VIDEO_HEIGHT, VIDEO_WIDTH, 3), np.uint8)
+    def _acquire_display_slot(self, frame: np.ndarray) -> Optional[CapturedFrame]:
+        """Buffer di display libero, riallocato solo se cambia la forma del frame"""
+        slot = self.display_buffer.acquire_write()
+        if slot is None:
+            return None
+        if slot.image is None or slot.image.shape != frame.shape:
+            slot.image = np.empty_like(frame)
+        return slot
     def _interpolate_display_state(self):
-        """Interpola tutti gli stati display verso target"""
+        """Porta gli stati display verso target con smorzamento critico basato sul tempo"""
+        now = time.monotonic()
+        dt = now - self._last_interpolation
+        self._last_interpolation = now
+        
         for cid in range(1, 7):
             target = self.cached_state[cid]
             current = self.display_state[cid]
+            velocity = self._display_velocity[cid]
             
-            # Lerp con velocità ottimizzata
-            current.zoom = self._lerp(current.zoom, target.zoom, self.INTERPOLATION_SPEED)
-            current.pan = self._lerp(current.pan, target.pan, self.INTERPOLATION_SPEED)
-            current.tilt = self._lerp(current.tilt, target.tilt, self.INTERPOLATION_SPEED)
-
-    def _lerp(self, current: float, target: float, speed: float) -> float:
-        """Linear interpolation ottimizzata"""
-        diff = target - current
-        
-        # Se differenza molto piccola, snap al target per evitare oscillazioni
-        if abs(diff) < 0.001:
-            return target
-        
-        return current + diff * speed
+            current.zoom, velocity[0] = smooth_damp(current.zoom, target.zoom, velocity[0], self.SMOOTHING_TIME, dt)
+            current.pan, velocity[1] = smooth_damp(current.pan, target.pan, velocity[1], self.SMOOTHING_TIME, dt)
+            current.tilt, velocity[2] = smooth_damp(current.tilt, target.tilt, velocity[2], self.SMOOTHING_TIME, dt)
 
     def _process_camera_commands(self):
         cid = self.active_cam_id
         current_time = time.time()
         mode = self.cam_modes[cid]
+        self._update_state_subscription(cid, mode)
         
         # 1. Gestione Input manuale
         is_manual_input = (self.cmd_p != 0 or self.cmd_t != 0 or self.cmd_z != 0)
@@ -331,6 +358,20 @@ class VideoThread(QThread):
                 self._process_scan_mode(cid, current_time)
             # NOTA: MODE_TRACK viene elaborato in _prepare_display_frame() per avere
             # accesso al frame PRIMA del digital_zoom e delle modifiche di rendering
+    def _update_state_subscription(self, cid: int, mode: int):
+        """Mantiene fresco lo stato della telecamera attiva: più spesso in SCAN/TRACK"""
+        if mode in (MODE_SCAN, MODE_TRACK):
+            max_age = self.AUTO_STATE_MAX_AGE
+        else:
+            max_age = self.visca_controller.STATE_TIMEOUT
+        
+        subscription = self._state_subscription
+        if subscription is not None and subscription.cam_id == cid and subscription.max_age == max_age:
+            return
+        if subscription is not None:
+            self.visca_controller.unsubscribe(subscription)
+        self._state_subscription = self.visca_controller.subscribe(cid, max_age=max_age)
+
     def _send_manual_commands(self, cid: int):
         """Invia comandi manuali e aggiorna localmente il target per feedback immediato"""
         commands_sent = False
@@ -374,10 +415,7 @@ class VideoThread(QThread):
         # Inviamo i comandi solo se c'è un cambiamento di stato
         if commands_sent:
             # Pan/Tilt combinati
-            pan_dir = "01" if self.cmd_p < 0 else ("02" if self.cmd_p > 0 else "03")
-            tilt_dir = "01" if self.cmd_t < 0 else ("02" if self.cmd_t > 0 else "03")
-            
-            pan_tilt_hex = f"0106010505{pan_dir}{tilt_dir}FF"
+            pan_tilt_hex = pan_tilt_drive(self.cmd_p, self.cmd_t)
             self.visca_controller.send(cid, pan_tilt_hex, retry=False)
             
             
@@ -392,8 +430,7 @@ class VideoThread(QThread):
             return
         self.last_scan_time[cid] = current_time
 
-        self.visca_controller.send(cid, "81090612FF", retry=False)
-
+        # Lo stato è mantenuto fresco dalla sottoscrizione (AUTO_STATE_MAX_AGE)
         # --- MODIFICA QUI ---
         # Invece di state = self.get_camera_state(cid)
         # Accediamo direttamente all'oggetto per evitare filtri
@@ -419,8 +456,7 @@ class VideoThread(QThread):
             return
 
         # Movimento
-        p_dir = "02" if self.scan_dir[cid] > 0 else "01"
-        self.visca_controller.send(cid, f"0106010505{p_dir}03FF", retry=False)
+        self.visca_controller.send(cid, pan_tilt_drive(self.scan_dir[cid], 0), retry=False)
     def _process_track_mode_simple(self, frame: Optional[np.ndarray], cid: int):
         """
         Modalità tracking semplificata - senza face detection.
@@ -458,7 +494,7 @@ class VideoThread(QThread):
         Modalità tracciamento automatico del viso.
         Usa zoom digitale per centrare e seguire il viso.
         """
-        if frame is None or self.face_cascade is None:
+        if frame is None or self.detection_pool is None:
             return
         
         # Protezione: verifica che il frame sia valido
@@ -472,16 +508,11 @@ class VideoThread(QThread):
             return
         self.last_track_time[cid] = current_time
 
-        # 2. Rilevamento volti
+        # 2. Ultimo risultato del pool di detection, compensato per la latenza
         try:
-            # Converti a grayscale in modo sicuro
-            try:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            except Exception as cvt_err:
-                # Fallback: usa slicing manuale
-                gray = frame[:, :, 0]  # Prendi solo il canale B
-            
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 6, minSize=(50, 50))
+            box = self.detection_pool.predicted_box(cid)
+            faces = [box] if box is not None else []
+            self._last_faces = faces
             
             if len(faces) == 0:
                 # Quando non rilevato: riporta gradualmente al centro
@@ -496,11 +527,11 @@ class VideoThread(QThread):
             return
         
         try:
-            # 3. Seleziona il volto più grande
-            fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+            # 3. Volto seguito dal tracker
+            fx, fy, fw, fh = box
             
-            # Protezione: verifica indici validi
-            if not (0 <= fx < frame.shape[1] and 0 <= fy < frame.shape[0]):
+            # Protezione: il riquadro filtrato può sporgere, il centro no
+            if not (0 <= fx + fw // 2 < frame.shape[1] and 0 <= fy + fh // 2 < frame.shape[0]):
                 return
             
             # Dimensioni frame
@@ -614,31 +645,31 @@ class VideoThread(QThread):
             curr_p = float(state_obj.pan)
             curr_t = float(state_obj.tilt)
             
-            # Protezione limiti
-            p_dir = "03"
-            t_dir = "03"
+            # Protezione limiti (-1 sinistra/su, 1 destra/giù, 0 stop)
+            p_move = 0
+            t_move = 0
             
             if abs(offset_x) > tolerance_x:
-                p_dir = "02" if offset_x > 0 else "01"
+                p_move = 1 if offset_x > 0 else -1
                 
                 # Protezione dal superare i limiti
-                if p_dir == "02" and curr_p >= 950:
-                    p_dir = "03"
-                elif p_dir == "01" and curr_p <= -950:
-                    p_dir = "03"
+                if p_move > 0 and curr_p >= 950:
+                    p_move = 0
+                elif p_move < 0 and curr_p <= -950:
+                    p_move = 0
             
             if abs(offset_y) > tolerance_y:
-                t_dir = "02" if offset_y > 0 else "01"
+                t_move = 1 if offset_y > 0 else -1
                 
                 # Protezione dal superare i limiti
-                if t_dir == "02" and curr_t >= 950:
-                    t_dir = "03"
-                elif t_dir == "01" and curr_t <= -950:
-                    t_dir = "03"
+                if t_move > 0 and curr_t >= 950:
+                    t_move = 0
+                elif t_move < 0 and curr_t <= -950:
+                    t_move = 0
             
             # Invia comando VISCA combinato
-            if p_dir != "03" or t_dir != "03":
-                cmd = f"0106010505{p_dir}{t_dir}FF"
+            if p_move != 0 or t_move != 0:
+                cmd = pan_tilt_drive(p_move, t_move)
                 self.visca_controller.send(cid, cmd, retry=False)
                 
         except Exception as e:
@@ -665,48 +696,26 @@ class VideoThread(QThread):
         cv2.line(frame, (VIDEO_WIDTH, 0), (0, VIDEO_HEIGHT), (50, 50, 50), 2)
         return frame
 
-    def _emit_frame(self, frame: np.ndarray):
-        """Mette il frame in una coda thread-safe - NON USA SIGNALS"""
+    def _emit_frame(self, display: CapturedFrame):
+        """Pubblica il buffer di display per il polling della GUI - NON USA SIGNALS"""
+        frame = display.image
         if frame is None or frame.size == 0:
+            self.display_buffer.abort_write(display)
             return
+        
+        # Nessuna conversione BGR → RGB né copia: la GUI mostra il buffer come
+        # QImage BGR888 (evita anche i crash di cv2.cvtColor con Wayland)
+        self.display_buffer.publish(display)
 
-        try:
-            h, w = frame.shape[:2]
-            if h <= 0 or w <= 0:
-                return
-            
-            # Converti BGR → RGB manualmente per evitare crash di cv2.cvtColor con Wayland
-            try:
-                rgb = frame[:, :, ::-1].copy()  # BGR -> RGB tramite slice inverso
-            except Exception as cv_err:
-                rgb = frame.copy()
-            
-            # Assicura che la memoria sia contigua
-            if not rgb.flags['C_CONTIGUOUS']:
-                rgb = np.ascontiguousarray(rgb)
-            
-            # Crea QImage da bytes
-            try:
-                qt_img = QImage(rgb.tobytes(), w, h, w * 3, 
-                               QImage.Format.Format_RGB888)
-            except Exception as qimg_err:
-                print(f"[EMIT] QImage creation error: {qimg_err}")
-                return
-            
-            # Metti in coda invece di emettere signal (evita crash Wayland)
-            try:
-                # Non attendere se la coda è piena - scarta frame vecchio
-                self.frame_queue.put_nowait(qt_img)
-            except Exception as queue_err:
-                # Coda piena - rimuovi frame vecchio e metti il nuovo
-                try:
-                    self.frame_queue.get_nowait()
-                    self.frame_queue.put_nowait(qt_img)
-                except:
-                    pass
-            
-        except Exception as e:
-            print(f"[EMIT ERROR] {type(e).__name__}: {e}")
+    def get_stage_timings(self) -> Dict[str, float]:
+        """
+        Tempi medi degli stadi del loop in millisecondi
+
+        Returns:
+            Dict: capture (attesa del frame), commands, sync, track, zoom, osd,
+                emit e frame (dall'arrivo alla pubblicazione)
+        """
+        return self.scheduler.timings()
 
     def _update_fps_counter(self):
         """Aggiorna contatore FPS"""
@@ -723,28 +732,35 @@ class VideoThread(QThread):
 
         # Se l'utente sta toccando i tasti, non sincronizzare
         if self.manual_override[cid]:
+            self._synced_version[cid] = -1  # Risincronizza al rilascio
             return 
 
         try:
-            new_state = self.visca_controller.get_camera_state_normalized(cid)
+            # Snapshot immutabile: nessun lock né dizionario per frame
+            new_state = self.visca_controller.get_snapshot(cid)
             target = self.cached_state[cid]
             
             # Per SCAN e TRACK: sincronizziamo SEMPRE senza filtri
             # (questi due modi si affidano al feedback dello stato per funzionare)
             if mode == MODE_SCAN or mode == MODE_TRACK:
-                target.zoom = new_state["zoom"]
-                target.pan = new_state["pan"]
-                target.tilt = new_state["tilt"]
+                target.zoom = new_state.zoom_norm
+                target.pan = new_state.pan_norm
+                target.tilt = new_state.tilt_norm
                 return
 
-            # Per MANUAL: logica di protezione per evitare jitter
-            diff_pan = abs(new_state["pan"] - target.pan)
-            diff_tilt = abs(new_state["tilt"] - target.tilt)
+            # Per MANUAL: niente da fare se il backend non ha novità
+            if new_state.version == self._synced_version[cid]:
+                return
+            self._synced_version[cid] = new_state.version
+
+            # Logica di protezione per evitare jitter
+            diff_pan = abs(new_state.pan_norm - target.pan)
+            diff_tilt = abs(new_state.tilt_norm - target.tilt)
             
             if diff_pan < 0.1 and diff_tilt < 0.1:
-                target.zoom = new_state["zoom"]
-                target.pan = new_state["pan"]
-                target.tilt = new_state["tilt"]
+                target.zoom = new_state.zoom_norm
+                target.pan = new_state.pan_norm
+                target.tilt = new_state.tilt_norm
                 
         except Exception as e:
             print(f"[SYNC ERROR] {e}")
@@ -760,7 +776,17 @@ class VideoThread(QThread):
             }
         return {"zoom": 2.0, "pan": 0.5, "tilt": 0.5}
 
-    def digital_zoom(self, frame: np.ndarray, cid: int) -> np.ndarray:
+    def digital_zoom(self, frame: np.ndarray, cid: int,
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Ritaglia e ingrandisce il frame secondo lo stato della telecamera
+
+        Args:
+            out: Buffer di destinazione preallocato (stessa forma del frame)
+
+        Returns:
+            np.ndarray: out con il frame ingrandito, o frame invariato senza zoom
+        """
         try:
             if frame is None or frame.size == 0:
                 return frame
@@ -771,54 +797,26 @@ class VideoThread(QThread):
             # Se lo zoom è vicino a 1, non fare nulla
             if z <= 1.05:
                 return frame
-                
-            h, w = frame.shape[:2]
-            if h <= 0 or w <= 0:
-                return frame
-            
-            # 1. Calcola quanto deve essere grande l'area visibile
-            new_w = max(1, int(w / z))
-            new_h = max(1, int(h / z))
             
-            # 2. Centra l'area (0.5 è il centro perfetto)
-            pan = max(0.0, min(1.0, state["pan"]))
-            tilt = max(0.0, min(1.0, state["tilt"]))
-            cx = int(w * pan)
-            cy = int(h * tilt)
-            
-            # 3. Definisci i bordi del rettangolo di ritaglio con protezioni
-            x1 = max(0, cx - new_w // 2)
-            y1 = max(0, cy - new_h // 2)
-            x2 = min(w, x1 + new_w)
-            y2 = min(h, y1 + new_h)
-            
-            # Protezione: assicura che il crop sia valido
-            if x2 <= x1 or y2 <= y1:
-                return frame
-            
-            # 4. Ritaglia e riporta alle dimensioni originali
-            cropped = frame[y1:y2, x1:x2]
-            if cropped.size > 0 and cropped.shape[0] > 0 and cropped.shape[1] > 0:
-                return cv2.resize(cropped, (w, h), interpolation=cv2.INTER_LINEAR)
-            return frame
+            # Ritaglio e scala in un solo warpAffine: lineare anche in movimento,
+            # nearest solo quando lo stadio zoom non sta nel tempo rimasto
+            quality = None if self.scheduler.fits("zoom") else QUALITY_FAST
+            return self.ptz.render(frame, z, state["pan"], state["tilt"], out=out, quality=quality)
         except Exception as e:
             print(f"[ZOOM ERROR] {e}")
             return frame
 
     def draw_faces(self, frame: np.ndarray):
-        """Disegna volti rilevati"""
-        if frame is None or frame.size == 0 or self.face_cascade is None:
+        """Disegna i volti rilevati dall'ultima detection TRACK (nessuna seconda passata)"""
+        if frame is None or frame.size == 0 or self.face_detector is None:
             return
         
         try:
             h_frame, w_frame = frame.shape[:2]
             if h_frame <= 0 or w_frame <= 0:
                 return
-                
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
             
-            for (x, y, w, h) in faces:
+            for (x, y, w, h) in self._last_faces:
                 # Protezione: verifica che le coordinate siano valide
                 if x < 0 or y < 0 or w <= 0 or h <= 0:
                     continue
@@ -898,18 +896,19 @@ class VideoThread(QThread):
         """Arresto coordinato dei thread"""
         print("[VIDEO] Arresto in corso...")
         self._run_flag = False
-        self.capture_running = False
         
-        try:
-            if self.cap and self.cap.isOpened():
-                self.cap.release()
-        except:
-            pass
+        if self._state_subscription is not None:
+            self.visca_controller.unsubscribe(self._state_subscription)
+            self._state_subscription = None
         
-        try:
-            if hasattr(self, 'capture_thread') and self.capture_thread.is_alive():
-                self.capture_thread.join(timeout=0.5)
-        except:
-            pass
+        if self.detection_pool is not None:
+            self.detection_pool.stop()
+        
+        # Uno stadio di cattura condiviso lo ferma chi lo ha creato
+        if self._owns_capture:
+            try:
+                self.capture.stop()
+            except Exception:
+                pass
         
         print("[VIDEO] Risorse rilasciate")
\ No newline at end of file
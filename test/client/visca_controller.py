@@ -158,69 +158,431 @@ class ViscaController:
         print("[VISCA] Controller chiuso")
 
 import socket
+import selectors
+import struct
 import threading
 import time
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, field
-from config import VISCA_PORT, CLIENT_BIND_IP
+from functools import lru_cache
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Optional, Dict, Any, Callable, Tuple, Iterable, List
+from dataclasses import dataclass
+from config import VISCA_PORT, CLIENT_BIND_IP, CAMERA_FLEET
+from fleet_state import FleetStateTable, HAS_NUMPY
 
 
-@dataclass
-class CameraState:
-    """Thread-safe camera state container"""
-    pan: int = 0  # RAW: -1000 to 1000
-    tilt: int = 0  # RAW: -1000 to 1000
-    zoom: int = 200  # RAW: 100 to 400
-    last_update: float = field(default_factory=time.time)
+class CameraSnapshot:
+    """
+    Stato immutabile di una telecamera
     
-    def copy(self) -> 'CameraState':
-        """Create a deep copy of the state"""
-        return CameraState(
-            pan=self.pan,
-            tilt=self.tilt,
-            zoom=self.zoom,
-            last_update=self.last_update
-        )
+    Il thread di ricezione crea un nuovo snapshot a ogni risposta e lo sostituisce
+    in blocco nel dizionario camera_states: i lettori ottengono un riferimento
+    coerente senza lock e senza allocazioni. version cresce solo quando cambiano
+    pan, tilt o zoom; last_update anche per le risposte identiche.
+    """
+    __slots__ = ("pan", "tilt", "zoom", "last_update", "version",
+                 "pan_norm", "tilt_norm", "zoom_norm")
 
+    def __init__(self, pan: int = 0, tilt: int = 0, zoom: int = 200,
+                 last_update: float = 0.0, version: int = 0):
+        # RAW: pan/tilt -1000..1000, zoom 100..400; last_update 0.0 = mai aggiornato
+        setattr_ = object.__setattr__
+        setattr_(self, "pan", pan)
+        setattr_(self, "tilt", tilt)
+        setattr_(self, "zoom", zoom)
+        setattr_(self, "last_update", last_update)
+        setattr_(self, "version", version)
+        # Valori normalizzati per display, calcolati una volta sola
+        setattr_(self, "pan_norm", max(0.0, min(1.0, (pan + 1000) / 2000.0)))
+        setattr_(self, "tilt_norm", max(0.0, min(1.0, (tilt + 1000) / 2000.0)))
+        setattr_(self, "zoom_norm", max(1.0, min(4.0, zoom / 100.0)))
 
-class ViscaController:
-    """Gestisce la comunicazione protocollo VISCA con il server telecamere"""
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("CameraSnapshot è immutabile")
+
+    def __repr__(self) -> str:
+        return (f"CameraSnapshot(pan={self.pan}, tilt={self.tilt}, zoom={self.zoom}, "
+                f"version={self.version})")
+
+
+@dataclass(frozen=True)
+class CameraEndpoint:
+    """Destinazione di una telecamera: host, porta UDP e indirizzo VISCA (1-7)"""
+    host: str
+    port: int = VISCA_PORT
+    address: int = 1
+
+
+class PendingRequest:
+    """Richiesta VISCA inviata e in attesa di risposta"""
+    __slots__ = ("sequence", "cam_id", "is_inquiry", "sent_at", "timeout", "future",
+                 "command", "attempt", "retry", "socket")
+
+    def __init__(self, sequence: int, cam_id: int, is_inquiry: bool, future=None,
+                 command: Optional['CompiledCommand'] = None, attempt: int = 0,
+                 timeout: float = 0.15, retry: bool = False):
+        self.sequence = sequence
+        self.cam_id = cam_id
+        self.is_inquiry = is_inquiry
+        self.sent_at = time.time()
+        # Attesa della prima risposta (RTO adattivo, raddoppiato a ogni ritrasmissione)
+        self.timeout = timeout
+        # Future di concurrent.futures o di asyncio (AsyncViscaController)
+        self.future = future if future is not None else Future()
+        # Comando originale, per poterlo ripianificare o ritrasmettere
+        self.command = command
+        self.attempt = attempt
+        self.retry = retry
+        # Socket comandi della telecamera (y dell'ACK z0 4y FF), None prima dell'ACK
+        self.socket: Optional[int] = None
+
+
+def split_visca_ip_packet(data: bytes) -> Tuple[Optional[int], bytes]:
+    """
+    Separa header VISCA over IP e messaggio VISCA
+    
+    Args:
+        data: Datagramma ricevuto
+        
+    Returns:
+        tuple: (numero di sequenza o None se il pacchetto è raw, payload)
+    """
+    # Byte 0-1: Tipo (01 00 comando, 01 10 inquiry, 01 11 risposta, 02 xx controllo).
+    # Le risposte raw del simulatore iniziano con 0x90/0x91 e non hanno header.
+    if len(data) > 8 and data[0] in (0x01, 0x02):
+        length = int.from_bytes(data[2:4], 'big')
+        sequence = int.from_bytes(data[4:8], 'big')
+        return sequence, data[8:8 + length]
+    return None, data
+
+
+# Header VISCA over IP: Tipo (2 byte), Lunghezza (2 byte), Sequenza (4 byte)
+VISCA_IP_HEADER = struct.Struct('>HHI')
+VISCA_IP_COMMAND = 0x0100
+MAX_VISCA_MESSAGE = 16
+
+# Inquiry di posizione: il simulatore risponde con pan, tilt e zoom insieme
+STATUS_INQUIRY = "81090612FF"
+STATE_AXES = ("pan", "tilt", "zoom")
+
+
+# Categorie (byte 1-2) da non ritrasmettere: eseguite due volte sommano lo spostamento
+NON_IDEMPOTENT_COMMANDS = (
+    b'\x06\x03',  # Pan-tiltDrive RelativePosition
+)
+
+
+class CompiledCommand:
+    """Messaggio VISCA già codificato e indirizzato, riusabile senza parsing"""
+    __slots__ = ("message", "is_inquiry", "is_movement", "is_idempotent")
+
+    def __init__(self, message: bytes):
+        self.message = message
+        self.is_inquiry = len(message) > 1 and message[1] == 0x09
+        # Pan/Tilt Drive (xx 06 01) o Zoom (xx 04 07)
+        self.is_movement = message[1:3] in (b'\x06\x01', b'\x04\x07')
+        # Ritrasmettibile senza effetti doppi: tutto tranne i movimenti relativi
+        self.is_idempotent = message[1:3] not in NON_IDEMPOTENT_COMMANDS
+
+    def queue_key(self) -> Any:
+        """Chiave nella coda: una per categoria di movimento, unica per gli altri comandi"""
+        return self.message[1:3] if self.is_movement else object()
+
+
+@lru_cache(maxsize=1024)
+def compile_command(address: int, hex_cmd: str) -> CompiledCommand:
+    """
+    Converte un comando esadecimale nel messaggio VISCA indirizzato alla telecamera
+    
+    Il risultato è in cache per (indirizzo, comando): i loop di controllo a
+    30-60 Hz ripetono sempre gli stessi comandi.
+    
+    Args:
+        address: Indirizzo VISCA (coincide con l'ID telecamera sul simulatore C#)
+        hex_cmd: Comando in stringa esadecimale
+    
+    Returns:
+        CompiledCommand: Messaggio pronto per l'invio
+    
+    Raises:
+        ValueError: Comando non esadecimale, vuoto o più lungo di MAX_VISCA_MESSAGE
+    """
+    cmd_bytes = bytearray.fromhex(hex_cmd)
+    # Il buffer di invio riutilizzabile ha posto per MAX_VISCA_MESSAGE byte
+    if not 0 < len(cmd_bytes) <= MAX_VISCA_MESSAGE:
+        raise ValueError(f"Comando VISCA di {len(cmd_bytes)} byte "
+                         f"(ammessi 1-{MAX_VISCA_MESSAGE}): {hex_cmd}")
+    # Forza l'indirizzo nel primo byte (0x80 | address)
+    cmd_bytes[0] = 0x80 | (address & 0x0F)
+    return CompiledCommand(bytes(cmd_bytes))
+
+
+class OutboundQueue:
+    """
+    Coda dei comandi in uscita di una telecamera
+    
+    Tiene al massimo un movimento per categoria (Pan/Tilt, Zoom): un nuovo
+    comando sostituisce quello in attesa. Scarta i duplicati dello stato di moto
+    già inviato e limita i comandi al secondo con un token bucket. Gli altri
+    comandi (preset, setup) sono accodati in ordine senza coalescenza.
+    """
+    __slots__ = ("queued", "last_sent", "last_sent_at", "tokens", "last_refill")
+
+    def __init__(self, burst: int):
+        # chiave (categoria o comando singolo) -> (comando, future, tentativo, retry)
+        self.queued: Dict[Any, Tuple[CompiledCommand, Future, int, bool]] = {}
+        self.last_sent: Dict[bytes, bytes] = {}
+        self.last_sent_at: Dict[bytes, float] = {}
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+
+    def offer(self, compiled: CompiledCommand, future: Future,
+              duplicate_window: float, retry: bool = True) -> Tuple[bool, Optional[Future]]:
+        """
+        Accoda un comando
+        
+        Returns:
+            tuple: (True se accodato, Future del comando sostituito o scartato)
+        """
+        category = compiled.queue_key()
+        superseded = self.queued.pop(category, None)
+        superseded_future = superseded[1] if superseded else None
+        
+        # Stesso moto già in corso sulla telecamera: niente da inviare
+        if (self.last_sent.get(category) == compiled.message and
+                time.monotonic() - self.last_sent_at.get(category, 0.0) < duplicate_window):
+            return False, superseded_future
+        
+        self.queued[category] = (compiled, future, 0, retry)
+        return True, superseded_future
+
+    def requeue(self, compiled: CompiledCommand, future: Future, attempt: int,
+                retry: bool = True) -> bool:
+        """
+        Rimette in coda un comando rifiutato dalla telecamera (socket o buffer pieni)
+        
+        Returns:
+            bool: False se nel frattempo è stato accodato un movimento più recente
+        """
+        category = compiled.queue_key()
+        # Il comando non è stato eseguito: non è il moto in corso
+        if self.last_sent.get(category) == compiled.message:
+            del self.last_sent[category]
+        if category in self.queued:
+            return False
+        self.queued[category] = (compiled, future, attempt, retry)
+        return True
+
+    def take(self, rate: float, burst: int) -> Optional[Tuple[CompiledCommand, Future, int, bool]]:
+        """Estrae il comando in attesa più vecchio se il rate limit lo consente"""
+        if not self.queued:
+            return None
+        
+        now = time.monotonic()
+        self.tokens = min(float(burst), self.tokens + (now - self.last_refill) * rate)
+        self.last_refill = now
+        if self.tokens < 1.0:
+            return None
+        
+        self.tokens -= 1.0
+        category = next(iter(self.queued))
+        item = self.queued.pop(category)
+        if item[0].is_movement:
+            self.last_sent[category] = item[0].message
+            self.last_sent_at[category] = now
+        return item
+
+    def wait_time(self, rate: float) -> float:
+        """Secondi prima che il prossimo comando in coda possa partire"""
+        if not self.queued:
+            return float('inf')
+        return max(0.0, (1.0 - self.tokens) / rate)
+
+
+class CommandSockets:
+    """
+    I due socket comandi di una telecamera VISCA
+    
+    Un comando occupa un posto dall'invio fino al Completion (z0 5y FF) o a un
+    errore; l'ACK (z0 4y FF) indica quale socket y lo sta eseguendo. Con tutti
+    i posti occupati i comandi restano in coda invece di provocare l'errore
+    "Nessun socket disponibile" (z0 6y 05).
+    """
+    __slots__ = ("capacity", "in_flight", "busy", "blocked_until")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        # socket VISCA (1 o 2) -> sequenza del comando in esecuzione
+        self.busy: Dict[int, int] = {}
+        self.blocked_until = 0.0
+
+    def available(self, now: float) -> bool:
+        """True se un nuovo comando può partire"""
+        return self.in_flight < self.capacity and now >= self.blocked_until
+
+    def wait_time(self, now: float) -> float:
+        """Secondi prima che si liberi un posto (inf se si attende una risposta)"""
+        if self.in_flight >= self.capacity:
+            return float('inf')
+        return max(0.0, self.blocked_until - now)
+
+    def acquire(self):
+        self.in_flight += 1
+
+    def ack(self, socket_no: int, sequence: int):
+        self.busy[socket_no] = sequence
+
+    def release(self, sequence: int, socket_no: Optional[int] = None):
+        self.in_flight = max(0, self.in_flight - 1)
+        if socket_no is not None and self.busy.get(socket_no) == sequence:
+            del self.busy[socket_no]
+
+    def block(self, delay: float):
+        """La telecamera ha rifiutato un comando: pausa prima del prossimo"""
+        self.blocked_until = time.monotonic() + delay
+
+
+class InquiryPipeline:
+    """
+    Inquiry in uscita di una telecamera
+    
+    Separata dalla coda dei comandi: non occupa i socket comandi e non consuma
+    il rate limit, quindi il polling della posizione non ritarda i movimenti.
+    Un'inquiry identica a una già in coda ne condivide la risposta.
+    """
+    __slots__ = ("queued", "in_flight")
+
+    def __init__(self):
+        # messaggio -> (inquiry, future, tentativo, retry)
+        self.queued: Dict[bytes, Tuple[CompiledCommand, Future, int, bool]] = {}
+        self.in_flight = 0
+
+    def offer(self, compiled: CompiledCommand, future: Future, retry: bool = True) -> Future:
+        """Accoda l'inquiry e ritorna il Future che riceverà la risposta"""
+        queued = self.queued.get(compiled.message)
+        if queued is not None:
+            return queued[1]
+        self.queued[compiled.message] = (compiled, future, 0, retry)
+        return future
+
+    def take(self, limit: int) -> Optional[Tuple[CompiledCommand, Future, int, bool]]:
+        """Estrae l'inquiry più vecchia se le inquiry in volo sono meno di limit"""
+        if not self.queued or self.in_flight >= limit:
+            return None
+        self.in_flight += 1
+        return self.queued.pop(next(iter(self.queued)))
+
+    def release(self):
+        self.in_flight = max(0, self.in_flight - 1)
+
+
+class RttEstimator:
+    """
+    Stima del round-trip time di una telecamera (algoritmo di Jacobson/Karels, RFC 6298)
+    
+    Su LAN l'RTO scende verso min_rto; su VPN cresce con latenza e jitter
+    misurati invece di far scadere risposte valide dopo un timeout fisso.
+    """
+    __slots__ = ("srtt", "rttvar", "rto", "min_rto", "max_rto")
+
+    def __init__(self, initial_rto: float, min_rto: float, max_rto: float):
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.rto = initial_rto
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+
+    def sample(self, rtt: float):
+        """Aggiorna la stima con l'RTT di una richiesta non ritrasmessa"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.rto = min(self.max_rto, max(self.min_rto, self.srtt + 4 * self.rttvar))
+
+    def backoff(self):
+        """Timeout: raddoppia l'RTO fino alla prossima misura valida"""
+        self.rto = min(self.max_rto, self.rto * 2)
+
+    def timeout(self, attempt: int = 0) -> float:
+        """Attesa per il tentativo attempt (backoff esponenziale limitato a max_rto)"""
+        return min(self.max_rto, self.rto * (2 ** attempt))
+
+
+class StateSubscription:
+    """
+    Interesse di un consumatore per lo stato di una telecamera
+    
+    Il controller mantiene lo stato più fresco di max_age secondi finché la
+    sottoscrizione è attiva, e chiama callback(cam_id, snapshot) quando uno
+    degli assi osservati cambia.
+    """
+    __slots__ = ("cam_id", "axes", "max_age", "callback", "last_values")
+
+    def __init__(self, cam_id: int, axes: Tuple[str, ...], max_age: float,
+                 callback: Optional[Callable[[int, 'CameraSnapshot'], None]]):
+        self.cam_id = cam_id
+        self.axes = axes
+        self.max_age = max_age
+        self.callback = callback
+        self.last_values: Optional[Tuple] = None
+
+
+def build_visca_ip_packet(message: bytes, sequence: int) -> bytes:
+    """Antepone l'header VISCA over IP (tipo comando) al messaggio"""
+    return VISCA_IP_HEADER.pack(VISCA_IP_COMMAND, len(message), sequence) + message
+
+
+def is_status_reply(payload: bytes) -> bool:
+    """True se il payload è una risposta di stato pan/tilt/zoom del simulatore C#"""
+    return len(payload) >= 8 and payload[0] in (0x90, 0x91) and (payload[1] & 0xF0) == 0x80
+
+
+class ViscaControllerBase:
+    """Stato telecamere, statistiche e smistamento risposte comuni ai controller VISCA"""
     
     # Costanti di configurazione
-    RESPONSE_TIMEOUT = 0.15  # Aumentato per reti più lente
-    SYNC_INTERVAL = 0.3  # Sincronizzazione ogni 300ms
+    RESPONSE_TIMEOUT = 0.15  # RTO iniziale, poi adattato all'RTT misurato
+    MIN_RTO = 0.05
+    MAX_RTO = 1.0  # Anche su VPN lenta la GUI non attende oltre
+    SYNC_INTERVAL = 0.3  # Freschezza di default delle sottoscrizioni
     STATE_TIMEOUT = 3.0  # Considera stale dopo 3 secondi
-    MAX_RETRIES = 3
-    RETRY_DELAY = 0.05
+    MAX_RETRIES = 3  # Ritrasmissioni dei comandi idempotenti senza risposta
+    RETRY_DELAY = 0.05  # Pausa dopo un rifiuto per socket o buffer pieni
+    COMPLETION_TIMEOUT = 5.0  # Attesa del Completion dopo l'ACK
     
-    def __init__(self, ip: str):
+    def __init__(self, cam_ids: Iterable[int] = range(1, 7)):
         """
-        Inizializza il controller VISCA
-        
         Args:
-            ip: Indirizzo IP del server
+            cam_ids: ID delle telecamere gestite
         """
-        self.server_ip = ip
-
-        self.sequence = 1
         self._running = True
+        cam_ids = list(cam_ids)
         
-        # Stato sincronizzato delle telecamere
-        self.camera_states: Dict[int, CameraState] = {
-            i: CameraState() for i in range(1, 7)
+        # Stato delle telecamere: snapshot immutabili sostituiti in blocco
+        self.camera_states: Dict[int, CameraSnapshot] = {
+            i: CameraSnapshot() for i in cam_ids
         }
         
-        # Lock separati per migliore concorrenza
-        self._state_locks = {i: threading.RLock() for i in range(1, 7)}
-        self._socket_lock = threading.Lock()
+        # Solo gli scrittori si sincronizzano; i lettori leggono il riferimento
+        self._state_write_lock = threading.Lock()
         
-        # Statistiche e diagnostica
-        self._stats = {
-            "commands_sent": 0,
-            "responses_received": 0,
-            "errors": 0,
-            "timeouts": 0
+        # Copia tabellare per le query vettoriali su tutta la flotta (richiede numpy)
+        self.fleet_state: Optional[FleetStateTable] = (
+            FleetStateTable(cam_ids) if HAS_NUMPY else None
+        )
+        
+        # Stima RTT per telecamera: timeout adattivi
+        self._rtt = {
+            i: RttEstimator(self.RESPONSE_TIMEOUT, self.MIN_RTO, self.MAX_RTO)
+            for i in cam_ids
         }
+        
+        # Statistiche e diagnostica (globali e per telecamera)
+        self._stats = self._empty_stats()
+        self._cam_stats = {i: self._empty_stats() for i in cam_ids}
         self._stats_lock = threading.Lock()
         
         # Mappatura codici errore
@@ -234,150 +596,156 @@ class ViscaController:
             0x4F: "GENERAL_ERROR - Errore generico telecamera"
         }
         
-        # Inizializza socket
-        self._init_socket()
-        
-        # Thread per sincronizzazione periodica
-        self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
-        self._sync_thread.start()
+        # Sottoscrizioni allo stato: solo le telecamere osservate vengono interrogate
+        self._subscriptions: Dict[int, List[StateSubscription]] = {i: [] for i in cam_ids}
+        self._freshness: Dict[int, float] = {}  # cam_id -> max_age più stringente
+        self._subscriptions_lock = threading.Lock()
         
-        print(f"[VISCA] Controller inizializzato per server {ip}")
-        print(f"[VISCA] Timeout risposta: {self.RESPONSE_TIMEOUT}s")
-        print(f"[VISCA] Intervallo sync: {self.SYNC_INTERVAL}s")
+        # Richieste in attesa di risposta, indicizzate per numero di sequenza
+        self._pending: Dict[int, PendingRequest] = {}
+        self._pending_lock = threading.Lock()
+        self._last_expire_check = time.time()
 
-    def _init_socket(self) -> bool:
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {
+            "commands_sent": 0,
+            "responses_received": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "commands_coalesced": 0,
+            "commands_dropped": 0,
+            "commands_requeued": 0,
+            "retransmissions": 0
+        }
+
+    def _resolve_cam_id(self, address: int, endpoint: Any = None) -> Optional[int]:
+        """Converte l'indirizzo VISCA di una risposta raw nell'ID telecamera"""
+        return address
+
+    def _dispatch_response(self, response: bytes, endpoint: Any = None):
         """
-        Inizializza il socket UDP
+        Associa una risposta alla richiesta in attesa
         
-        Returns:
-            bool: True se successo
+        Con header VISCA over IP si usa il numero di sequenza; le risposte raw
+        del simulatore C# vengono associate alla richiesta più vecchia della
+        stessa telecamera e dello stesso tipo (inquiry o comando).
+        
+        Args:
+            response: Datagramma ricevuto
+            endpoint: Chiave dell'endpoint da cui è arrivato (fleet mode)
         """
-        try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.sock.bind((CLIENT_BIND_IP, 0))
-            self.sock.settimeout(self.RESPONSE_TIMEOUT)
-            print(f"[VISCA] Socket bound to {CLIENT_BIND_IP}")
-            return True
-        except Exception as e:
-            print(f"[VISCA ERROR] Bind fallito: {e}")
-            self.sock = None
-            return False
+        sequence, payload = split_visca_ip_packet(response)
+        if len(payload) < 3:
+            return
+        
+        status = is_status_reply(payload)
+        # ACK (z0 4y FF): il comando è accettato, la richiesta resta aperta fino al Completion
+        ack = not status and (payload[1] & 0xF0) == 0x40
+        
+        rtt = None
+        with self._pending_lock:
+            pending = None
+            cam_id = None
+            if sequence is not None:
+                pending = self._pending.get(sequence)
+            elif (payload[1] & 0xF0) == 0x80:
+                cam_id = self._resolve_cam_id(payload[1] & 0x0F, endpoint)
+                for candidate in self._pending.values():
+                    if candidate.cam_id == cam_id and candidate.is_inquiry == status:
+                        pending = candidate
+                        break
+            
+            # Lo stato inviato in risposta a un comando non chiude la richiesta:
+            # la chiude l'ACK che segue
+            if pending is not None and status and not pending.is_inquiry:
+                cam_id = pending.cam_id
+                pending = None
+            elif pending is not None:
+                cam_id = pending.cam_id
+                # Algoritmo di Karn: si misura solo la prima risposta di un primo invio
+                if pending.socket is None and pending.attempt == 0:
+                    rtt = time.time() - pending.sent_at
+                if ack and not pending.is_inquiry:
+                    pending.socket = payload[1] & 0x0F
+                else:
+                    ack = False
+                    del self._pending[pending.sequence]
+        
+        if cam_id not in self.camera_states:
+            return
+        self._increment_stat("responses_received", cam_id, global_stat=False)
+        if rtt is not None:
+            self._rtt[cam_id].sample(rtt)
+        
+        if ack:
+            self._on_request_ack(pending)
+            return
+        
+        if status:
+            self._update_state_from_response(cam_id, payload)
+            result = None
+        else:
+            result = self._parse_standard_response(cam_id, payload)
+            if result:
+                self._increment_stat("errors", cam_id)
+        
+        if pending is not None:
+            if self._on_request_done(pending, payload):
+                return  # Ripianificata: il Future resta in attesa
+            if not pending.future.done():
+                pending.future.set_result(result)
 
-    def send(self, cam_id: int, hex_cmd: str, retry: bool = True) -> Optional[str]:
-        """
-        Invia un comando VISCA over IP con gestione della sequenza e risposta asincrona.
+    def _on_request_ack(self, pending: PendingRequest):
+        """Il comando è stato accettato su pending.socket"""
+
+    def _on_request_done(self, pending: PendingRequest, payload: Optional[bytes]) -> bool:
         """
-        if not self.sock:
-            return "Errore: Socket non inizializzato"
+        La richiesta è chiusa (payload None se scaduta)
         
-        try:
-            # 1. PULIZIA BUFFER (Evita di leggere risposte vecchie)
-            self.sock.setblocking(False)
-            while True:
-                try:
-                    self.sock.recvfrom(1024)
-                except (BlockingIOError, socket.error):
-                    break
-            self.sock.setblocking(True)
-            self.sock.settimeout(self.RESPONSE_TIMEOUT)
+        Returns:
+            bool: True se il comando è stato ripianificato o ritrasmesso
+        """
+        return False
 
-            # 2. PREPARAZIONE BYTE E INDIRIZZAMENTO (81, 82, ecc.)
-            cmd_bytes = bytearray.fromhex(hex_cmd)
-            # Forza l'ID telecamera nel primo byte (0x80 | cam_id)
-            cmd_bytes[0] = 0x80 | (cam_id & 0x0F)
-            
-            # 3. COSTRUZIONE HEADER VISCA OVER IP E INVIO
-            with self._socket_lock:
-                # Byte 0-1: Tipo (01 00 = Comando), Byte 2-3: Lunghezza, Byte 4-7: Sequenza
-                header = b'\x01\x00' + len(cmd_bytes).to_bytes(2, 'big') + self.sequence.to_bytes(4, 'big')
-                
-                full_packet = header + cmd_bytes
-                state = self.get_camera_state(cam_id)
-                pan = state["pan"]
-                print(f"[UDP SEND] {full_packet.hex().upper()} | Pan letto: {pan:.4f}")
-                self.sock.sendto(full_packet, (self.server_ip, VISCA_PORT))
-                
-                # Incrementiamo la sequenza per il prossimo comando
-                self.sequence += 1
-                
-                # Piccola pausa per i comandi di movimento (SCAN/TRACK) 
-                # per evitare congestione nel simulatore C#
-                if "0601" in hex_cmd or "0407" in hex_cmd:
-                    time.sleep(0.005)
-
-            self._increment_stat("commands_sent")
-
-            # 4. GESTIONE RICEZIONE
-            # Se è un movimento (Pan/Tilt/Zoom), elaboriamo la risposta in background 
-            # per non causare micro-scatti alla GUI durante lo SCAN o il TRACK.
-            if "0601" in hex_cmd or "0407" in hex_cmd:
-                threading.Thread(
-                    target=self._process_response, 
-                    args=(cam_id,), 
-                    daemon=True
-                ).start()
-                return None 
-            
-            # Per comandi critici (Inquiry o Setup), attendiamo la risposta in linea
-            return self._process_response(cam_id)
+    def get_response_timeout(self, cam_id: int, attempt: int = 0) -> float:
+        """Timeout adattivo della telecamera per il tentativo attempt"""
+        return self._rtt[cam_id].timeout(attempt)
 
-        except Exception as e:
-            self._increment_stat("errors")
-            return f"Errore invio VISCA: {e}"
-        
-    def send_without_response(self, cam_id: int, hex_cmd: str):
+    def get_rtt(self, cam_id: int) -> Dict[str, Optional[float]]:
         """
-        Invia comando VISCA senza aspettare risposta (per comandi di stop)
+        Stima RTT corrente della telecamera
         
-        Args:
-            cam_id: ID telecamera (1-6)
-            hex_cmd: Comando in stringa esadecimale
+        Returns:
+            dict: srtt, rttvar e rto in secondi (srtt None prima della prima misura)
         """
-        if not self.sock:
+        estimator = self._rtt[cam_id]
+        return {"srtt": estimator.srtt, "rttvar": estimator.rttvar, "rto": estimator.rto}
+
+    def _expire_pending(self):
+        """Fa scadere le richieste senza risposta (o senza Completion dopo l'ACK)"""
+        now = time.time()
+        if now - self._last_expire_check < self.MIN_RTO / 2:
             return
+        self._last_expire_check = now
         
-        try:
-            cmd_bytes = bytearray.fromhex(hex_cmd)
-            cmd_bytes[0] = 0x80 | cam_id
-            
-            with self._socket_lock:
-                header = (
-                    b'\x01\x00' + 
-                    len(cmd_bytes).to_bytes(2, 'big') + 
-                    self.sequence.to_bytes(4, 'big')
-                )
-                self.sequence += 1
-                self.sock.sendto(header + cmd_bytes, (self.server_ip, VISCA_PORT))
-            
-            self._increment_stat("commands_sent")
-            
-        except Exception as e:
-            print(f"[VISCA ERROR] Send without response: {e}")
-
-    def _process_response(self, cam_id: int) -> Optional[str]:
-        try:
-            # Ricezione dal socket
-            response, _ = self.sock.recvfrom(1024)  
-            self._increment_stat("responses_received")
-            
-            if not response: 
-                return None
-            
-            # 8 byte di header VISCA over IP, il resto è il messaggio
-            payload = response[8:] if response[0] == 0x01 else response
-
-            if len(payload) >= 8:
-                # Accettiamo 0x90 o 0x91 (Risposte dal simulatore C#)
-                if payload[0] in [0x90, 0x91]:
-                    self._update_state_from_response(cam_id, payload)
-                    return None
-
-        except (BlockingIOError, socket.timeout):
-            return None 
-        except Exception as e:
-            if self._running:
-                print(f"[VISCA DEBUG] Errore ricezione: {e}")
-        return None
+        with self._pending_lock:
+            expired = [
+                p for p in self._pending.values()
+                if now - p.sent_at > (p.timeout if p.socket is None
+                                      else self.COMPLETION_TIMEOUT)
+            ]
+            for p in expired:
+                del self._pending[p.sequence]
+        
+        for p in expired:
+            self._increment_stat("timeouts", p.cam_id)
+            if p.socket is None:
+                self._rtt[p.cam_id].backoff()
+            if self._on_request_done(p, None):
+                continue  # Ritrasmessa
+            if not p.future.done():
+                p.future.set_exception(TimeoutError(f"Nessuna risposta da CAM {p.cam_id}"))
 
     def _parse_standard_response(self, cam_id: int, response: bytes) -> Optional[str]:
         """
@@ -392,22 +760,16 @@ class ViscaController:
         """
         if len(response) < 3:
             return None
-            
-        response_cam_id = response[1] & 0x0F
-        completion_code = response[2]
         
-        # Verifica telecamera corretta
-        if response_cam_id != cam_id:
-            return None  # Ignora risposte per altre telecamere
+        # ACK e Completion (anche risposte alle inquiry): nessun errore
+        if (response[1] & 0xF0) in (0x40, 0x50):
+            return None
+        
+        # La telecamera è già stata verificata da _dispatch_response
+        completion_code = response[2]
         
-        # Codici di successo
+        # Codici di successo (lo stato arriva già insieme all'ACK)
         if completion_code == 0x00:
-            # Richiedi stato aggiornato in background
-            threading.Thread(
-                target=self._request_status,
-                args=(cam_id,),
-                daemon=True
-            ).start()
             return None
         
         # Codici di errore
@@ -438,71 +800,142 @@ class ViscaController:
             tilt_raw = (response[4] << 8) | response[5]
             zoom_raw = (response[6] << 8) | response[7]
             
-            # Conversione in INTERI per la classe CameraState
+            # Conversione in INTERI per CameraSnapshot
             # Il C# manda 0..2000, noi salviamo -1000..1000
             new_pan = int(pan_raw - 1000)
             new_tilt = int(tilt_raw - 1000)
             new_zoom = int(zoom_raw)
             
-            with self._state_locks[cam_id]:
-                state = self.camera_states[cam_id]
-                state.pan = new_pan
-                state.tilt = new_tilt
-                state.zoom = new_zoom
-                state.last_update = time.time()
+            with self._state_write_lock:
+                previous = self.camera_states[cam_id]
+                changed = (previous.pan, previous.tilt, previous.zoom) != (new_pan, new_tilt, new_zoom)
+                # Sostituzione atomica del riferimento
+                snapshot = CameraSnapshot(
+                    new_pan, new_tilt, new_zoom, time.time(),
+                    previous.version + 1 if changed else previous.version
+                )
+                self.camera_states[cam_id] = snapshot
+                if self.fleet_state is not None:
+                    self.fleet_state.update(cam_id, new_pan, new_tilt, new_zoom,
+                                            snapshot.last_update, snapshot.version)
                 
         except Exception as e:
             print(f"[VISCA ERROR] Update state cam {cam_id}: {e}")
+            return
+        
+        self._notify_subscribers(cam_id)
 
-    def _request_status(self, cam_id: int):
+    def subscribe(self, cam_id: int,
+                  callback: Optional[Callable[[int, CameraSnapshot], None]] = None,
+                  max_age: Optional[float] = None,
+                  axes: Iterable[str] = STATE_AXES) -> StateSubscription:
         """
-        Richiede stato aggiornato della telecamera
+        Registra l'interesse per lo stato di una telecamera
+        
+        Il controller invia le sole inquiry necessarie a mantenere lo stato di
+        ogni telecamera osservata entro il max_age più stringente; le telecamere
+        senza sottoscrizioni non generano traffico. La callback viene chiamata
+        dal thread di ricezione: deve essere breve (nella GUI emettere un segnale).
         
         Args:
             cam_id: ID telecamera
+            callback: Chiamata con (cam_id, CameraSnapshot) quando un asse osservato cambia
+            max_age: Età massima dello stato in secondi (default SYNC_INTERVAL)
+            axes: Assi osservati per la callback ('pan', 'tilt', 'zoom')
+        
+        Returns:
+            StateSubscription: Da passare a unsubscribe()
         """
-        if not self.sock:
-            return
+        if cam_id not in self._subscriptions:
+            raise ValueError(f"Telecamera {cam_id} non gestita")
+        axes = tuple(axes)
+        unknown = set(axes) - set(STATE_AXES)
+        if unknown:
+            raise ValueError(f"Assi non validi: {sorted(unknown)}")
         
-        try:
-            inquiry_cmd = bytearray([0x80 | cam_id, 0x09, 0x06, 0x12, 0xFF])
-            
-            with self._socket_lock:
-                header = (
-                    b'\x01\x00' + 
-                    len(inquiry_cmd).to_bytes(2, 'big') + 
-                    self.sequence.to_bytes(4, 'big')
-                )
-                self.sequence += 1
-                self.sock.sendto(header + inquiry_cmd, (self.server_ip, VISCA_PORT))
-            
-        except Exception as e:
-            print(f"[VISCA ERROR] Request status: {e}")
+        subscription = StateSubscription(
+            cam_id, axes, self.SYNC_INTERVAL if max_age is None else max_age, callback
+        )
+        with self._subscriptions_lock:
+            self._subscriptions[cam_id].append(subscription)
+            self._update_freshness(cam_id)
+        self._on_subscriptions_changed()
+        return subscription
+
+    def unsubscribe(self, subscription: StateSubscription):
+        """Rimuove una sottoscrizione (nessun effetto se già rimossa)"""
+        with self._subscriptions_lock:
+            subscriptions = self._subscriptions.get(subscription.cam_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+                self._update_freshness(subscription.cam_id)
+
+    def _update_freshness(self, cam_id: int):
+        """Ricalcola il max_age più stringente (con _subscriptions_lock acquisito)"""
+        subscriptions = self._subscriptions[cam_id]
+        if subscriptions:
+            self._freshness[cam_id] = min(s.max_age for s in subscriptions)
+        else:
+            self._freshness.pop(cam_id, None)
+
+    def _on_subscriptions_changed(self):
+        """Nuova sottoscrizione: lo scheduler delle inquiry va rivalutato"""
 
-    def _sync_loop(self):
-        """Loop di sincronizzazione periodica ottimizzato"""
-        print("[VISCA] Sync loop avviato")
+    def _stale_cameras(self, now: float) -> Tuple[List[int], float]:
+        """
+        Telecamere osservate il cui stato scade entro il prossimo RTT
         
-        while self._running:
+        Returns:
+            tuple: (telecamere da interrogare, secondi alla prossima scadenza)
+        """
+        with self._subscriptions_lock:
+            freshness = list(self._freshness.items())
+        
+        stale = []
+        next_due = float('inf')
+        for cam_id, max_age in freshness:
+            last_update = self.camera_states[cam_id].last_update
+            # L'inquiry parte un RTO prima: la risposta arriva prima della scadenza
+            due = last_update + max_age - self._rtt[cam_id].rto - now
+            if due <= 0:
+                stale.append(cam_id)
+            else:
+                next_due = min(next_due, due)
+        return stale, next_due
+
+    def _notify_subscribers(self, cam_id: int):
+        """Chiama le callback delle sottoscrizioni i cui assi sono cambiati"""
+        with self._subscriptions_lock:
+            subscriptions = [s for s in self._subscriptions[cam_id] if s.callback is not None]
+        if not subscriptions:
+            return
+        
+        snapshot = self.camera_states[cam_id]
+        for subscription in subscriptions:
+            values = tuple(getattr(snapshot, axis) for axis in subscription.axes)
+            if values == subscription.last_values:
+                continue
+            subscription.last_values = values
             try:
-                current_time = time.time()
-                
-                for cam_id in range(1, 7):
-                    # Verifica se stato è stale
-                    with self._state_locks[cam_id]:
-                        last_update = self.camera_states[cam_id].last_update
-                    
-                    if current_time - last_update > self.STATE_TIMEOUT:
-                        self._request_status(cam_id)
-                        time.sleep(0.02)  # Piccola pausa tra richieste
-                
-                time.sleep(self.SYNC_INTERVAL)
-                
+                subscription.callback(cam_id, snapshot)
             except Exception as e:
-                print(f"[VISCA ERROR] Sync loop: {e}")
-                time.sleep(1)
+                print(f"[VISCA ERROR] Callback stato cam {cam_id}: {e}")
+
+    def get_snapshot(self, cam_id: int) -> CameraSnapshot:
+        """
+        Snapshot corrente della telecamera, senza lock né allocazioni
         
-        print("[VISCA] Sync loop terminato")
+        Args:
+            cam_id: ID telecamera (1-6)
+            
+        Returns:
+            CameraSnapshot: Stato immutabile (valori RAW e normalizzati)
+        """
+        return self.camera_states[cam_id]
+
+    def has_changed(self, cam_id: int, version: int) -> bool:
+        """True se lo stato della telecamera è cambiato dalla versione indicata"""
+        return self.camera_states[cam_id].version != version
 
     def get_camera_state(self, cam_id: int) -> Dict[str, Any]:
         """
@@ -514,14 +947,13 @@ class ViscaController:
         Returns:
             dict: Stato con valori RAW
         """
-        with self._state_locks[cam_id]:
-            state = self.camera_states[cam_id]
-            return {
-                "pan": state.pan,
-                "tilt": state.tilt,
-                "zoom": state.zoom,
-                "last_update": state.last_update
-            }
+        state = self.camera_states[cam_id]
+        return {
+            "pan": state.pan,
+            "tilt": state.tilt,
+            "zoom": state.zoom,
+            "last_update": state.last_update
+        }
 
     def get_camera_state_normalized(self, cam_id: int) -> Dict[str, float]:
         """
@@ -533,20 +965,31 @@ class ViscaController:
         Returns:
             dict: Stato normalizzato
         """
-        with self._state_locks[cam_id]:
-            state = self.camera_states[cam_id]
-            
-            # Normalizzazione
-            pan_norm = (state.pan + 1000) / 2000.0
-            tilt_norm = (state.tilt + 1000) / 2000.0
-            zoom_display = state.zoom / 100.0
-            
-            # Clamp ai limiti
-            return {
-                "pan": max(0.0, min(1.0, pan_norm)),
-                "tilt": max(0.0, min(1.0, tilt_norm)),
-                "zoom": max(1.0, min(4.0, zoom_display))
-            }
+        # Normalizzazione e clamp già calcolati nello snapshot
+        state = self.camera_states[cam_id]
+        return {
+            "pan": state.pan_norm,
+            "tilt": state.tilt_norm,
+            "zoom": state.zoom_norm
+        }
+
+    def get_stale_cameras(self, timeout: Optional[float] = None) -> List[int]:
+        """
+        Telecamere con stato più vecchio di timeout (default STATE_TIMEOUT)
+        
+        Con numpy una sola operazione vettoriale su fleet_state, altrimenti
+        un ciclo sugli snapshot.
+        """
+        if timeout is None:
+            timeout = self.STATE_TIMEOUT
+        if self.fleet_state is not None:
+            return self.fleet_state.select(self.fleet_state.stale(timeout))
+        
+        now = time.time()
+        return [
+            cam_id for cam_id, state in self.camera_states.items()
+            if now - state.last_update > timeout
+        ]
 
     def is_camera_at_limit(self, cam_id: int, axis: str) -> bool:
         """
@@ -559,47 +1002,521 @@ class ViscaController:
         Returns:
             bool: True se al limite
         """
-        with self._state_locks[cam_id]:
-            state = self.camera_states[cam_id]
-            
-            limits = {
-                "pan": (state.pan <= -1000 or state.pan >= 1000),
-                "tilt": (state.tilt <= -1000 or state.tilt >= 1000),
-                "zoom": (state.zoom <= 100 or state.zoom >= 400)
-            }
-            
-            return limits.get(axis, False)
+        state = self.camera_states[cam_id]
+        
+        limits = {
+            "pan": (state.pan <= -1000 or state.pan >= 1000),
+            "tilt": (state.tilt <= -1000 or state.tilt >= 1000),
+            "zoom": (state.zoom <= 100 or state.zoom >= 400)
+        }
+        
+        return limits.get(axis, False)
 
-    def _increment_stat(self, stat_name: str):
+    def _increment_stat(self, stat_name: str, cam_id: Optional[int] = None,
+                        global_stat: bool = True):
         """Incrementa contatore statistiche in modo thread-safe"""
         with self._stats_lock:
-            self._stats[stat_name] = self._stats.get(stat_name, 0) + 1
+            if global_stat:
+                self._stats[stat_name] = self._stats.get(stat_name, 0) + 1
+            if cam_id in self._cam_stats:
+                cam_stats = self._cam_stats[cam_id]
+                cam_stats[stat_name] = cam_stats.get(stat_name, 0) + 1
 
-    def get_statistics(self) -> Dict[str, int]:
+    def get_statistics(self, cam_id: Optional[int] = None) -> Dict[str, int]:
         """
         Ottieni statistiche di utilizzo
         
+        Args:
+            cam_id: ID telecamera, None per le statistiche globali
+        
         Returns:
             dict: Statistiche correnti
         """
         with self._stats_lock:
+            if cam_id is not None:
+                return self._cam_stats[cam_id].copy()
             return self._stats.copy()
 
+
+class ViscaController(ViscaControllerBase):
+    """Gestisce la comunicazione protocollo VISCA con il server telecamere"""
+    
+    # Coda dei movimenti: evita di riempire il buffer comandi (errore 0x03)
+    MAX_COMMANDS_PER_SEC = 25  # Per telecamera
+    COMMAND_BURST = 3
+    DUPLICATE_WINDOW = 0.5  # Un moto identico viene ripetuto al massimo ogni 0.5s
+    
+    # Socket comandi della telecamera e pipeline separata per le inquiry
+    COMMAND_SOCKETS = 2
+    MAX_INQUIRIES_IN_FLIGHT = 1  # Per telecamera
+    
+    def __init__(self, ip: str, endpoints: Optional[Dict[int, CameraEndpoint]] = None):
+        """
+        Inizializza il controller VISCA
+        
+        Args:
+            ip: Indirizzo IP del server (modalità server unico con 6 telecamere)
+            endpoints: Fleet mode, {cam_id: CameraEndpoint}. Se None si usa
+                config.CAMERA_FLEET, e se anche quello è vuoto il server unico.
+        """
+        if endpoints is None and CAMERA_FLEET:
+            endpoints = {
+                cam_id: CameraEndpoint(*target)
+                for cam_id, target in CAMERA_FLEET.items()
+            }
+        if endpoints is None:
+            # Simulatore C#: stesse host/porta, indirizzo VISCA = ID telecamera
+            endpoints = {
+                cam_id: CameraEndpoint(ip, VISCA_PORT, cam_id)
+                for cam_id in range(1, 7)
+            }
+        
+        super().__init__(endpoints.keys())
+        self.server_ip = ip
+        self.endpoints: Dict[int, CameraEndpoint] = dict(endpoints)
+
+        self.sequence = 1
+        self._socket_lock = threading.Lock()
+        # Buffer di invio riusato (protetto da _socket_lock): header scritto in place
+        self._packet_buffer = bytearray(VISCA_IP_HEADER.size + MAX_VISCA_MESSAGE)
+        self._packet_view = memoryview(self._packet_buffer)
+        
+        # Un socket per ogni (host, porta), tutti serviti da un unico selector
+        self._selector = selectors.DefaultSelector()
+        self._sockets: Dict[Tuple[str, int], socket.socket] = {}
+        self._address_map: Dict[Tuple[Tuple[str, int], int], int] = {}
+        self._init_sockets()
+        
+        # Code dei comandi e delle inquiry, svuotate dal thread di ricezione
+        self._outbound = {
+            cam_id: OutboundQueue(self.COMMAND_BURST) for cam_id in self.endpoints
+        }
+        self._command_sockets = {
+            cam_id: CommandSockets(self.COMMAND_SOCKETS) for cam_id in self.endpoints
+        }
+        self._inquiries = {cam_id: InquiryPipeline() for cam_id in self.endpoints}
+        self._outbound_lock = threading.Lock()
+        # Socketpair per risvegliare il selector quando si accoda un comando
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ, None)
+        
+        # Unico thread di I/O: smista le risposte, svuota le code e pianifica
+        # le inquiry richieste dalle sottoscrizioni
+        self._receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self._receive_thread.start()
+        
+        hosts = len(self._sockets)
+        print(f"[VISCA] Controller inizializzato: {len(self.endpoints)} telecamere su {hosts} endpoint")
+        print(f"[VISCA] Timeout risposta iniziale: {self.RESPONSE_TIMEOUT}s (adattivo)")
+        print(f"[VISCA] Stato su sottoscrizione (freschezza default {self.SYNC_INTERVAL}s)")
+
+    def _init_sockets(self) -> bool:
+        """
+        Inizializza un socket UDP non bloccante per ogni endpoint
+        
+        Returns:
+            bool: True se successo
+        """
+        try:
+            for cam_id, endpoint in self.endpoints.items():
+                key = (endpoint.host, endpoint.port)
+                if key not in self._sockets:
+                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    sock.bind((CLIENT_BIND_IP, 0))
+                    sock.setblocking(False)
+                    self._selector.register(sock, selectors.EVENT_READ, key)
+                    self._sockets[key] = sock
+                self._address_map[(key, endpoint.address)] = cam_id
+            print(f"[VISCA] {len(self._sockets)} socket bound to {CLIENT_BIND_IP}")
+            return True
+        except Exception as e:
+            print(f"[VISCA ERROR] Bind fallito: {e}")
+            self._close_sockets()
+            return False
+
+    def _close_sockets(self):
+        """Chiude tutti i socket e il selector"""
+        for sock in list(self._sockets.values()) + [self._wakeup_recv, self._wakeup_send]:
+            try:
+                self._selector.unregister(sock)
+            except Exception:
+                pass
+            try:
+                sock.close()
+            except Exception:
+                pass
+        self._sockets.clear()
+        self._selector.close()
+
+    @property
+    def sock(self) -> Optional[socket.socket]:
+        """Socket del primo endpoint (compatibilità con la modalità server unico)"""
+        return next(iter(self._sockets.values()), None)
+
+    def _resolve_cam_id(self, address: int, endpoint: Any = None) -> Optional[int]:
+        """Converte (endpoint, indirizzo VISCA) nell'ID telecamera"""
+        return self._address_map.get((endpoint, address))
+
+    def send(self, cam_id: int, hex_cmd: str, retry: bool = True) -> Optional[str]:
+        """
+        Invia un comando VISCA over IP con gestione della sequenza e risposta asincrona.
+        
+        I movimenti (Pan/Tilt/Zoom) non attendono la risposta, che viene gestita
+        dal thread di ricezione. Inquiry e setup attendono in linea per il
+        timeout adattivo della telecamera, più le eventuali ritrasmissioni.
+        
+        Args:
+            cam_id: ID telecamera
+            hex_cmd: Comando in stringa esadecimale
+            retry: Ritrasmetti (fino a MAX_RETRIES volte, con backoff esponenziale)
+                i comandi idempotenti rimasti senza risposta
+        
+        Returns:
+            str: Messaggio di errore o None
+        """
+        if not self.sock:
+            return "Errore: Socket non inizializzato"
+        
+        try:
+            is_movement = compile_command(self.endpoints[cam_id].address, hex_cmd).is_movement
+            future = self.send_async(cam_id, hex_cmd, retry=retry)
+            
+            # Snapshot senza lock: il log non rallenta l'invio
+            pan = self.camera_states[cam_id].pan
+            print(f"[UDP SEND] CAM {cam_id} {hex_cmd.upper()} | Pan letto: {pan:.4f}")
+            
+            # I movimenti passano dalla coda con rate limit: nessuna attesa
+            if is_movement:
+                return None
+            
+            # Per comandi critici (Inquiry o Setup), attendiamo la risposta in linea
+            attempts = self.MAX_RETRIES + 1 if retry else 1
+            wait = sum(self.get_response_timeout(cam_id, a) for a in range(attempts))
+            try:
+                return future.result(timeout=wait)
+            except (FutureTimeout, TimeoutError):
+                return None
+
+        except Exception as e:
+            self._increment_stat("errors", cam_id)
+            return f"Errore invio VISCA: {e}"
+
+    def send_async(self, cam_id: int, hex_cmd: str,
+                   callback: Optional[Callable[[Future], None]] = None,
+                   retry: bool = True) -> Future:
+        """
+        Invia un comando VISCA senza bloccare e ritorna un Future
+        
+        Il Future viene risolto dal thread di ricezione con il messaggio di
+        errore della telecamera (o None se OK), oppure fallisce con
+        TimeoutError se non arriva risposta entro il timeout adattivo
+        (dopo le eventuali ritrasmissioni).
+        
+        I comandi passano dalla coda della telecamera e partono solo con un
+        socket comandi libero; i movimenti sostituiti da un comando più recente
+        o identici al moto in corso valgono None senza che nulla venga inviato.
+        Le inquiry seguono una pipeline separata con un proprio limite in volo.
+        
+        Args:
+            cam_id: ID telecamera (1-6)
+            hex_cmd: Comando in stringa esadecimale
+            callback: Chiamata con il Future quando la richiesta è risolta
+            retry: Ritrasmetti i comandi idempotenti rimasti senza risposta
+            
+        Returns:
+            Future: Risultato della richiesta
+        """
+        compiled = compile_command(self.endpoints[cam_id].address, hex_cmd)
+        future: Future = Future()
+        
+        if compiled.is_inquiry:
+            with self._outbound_lock:
+                future = self._inquiries[cam_id].offer(compiled, future, retry)
+            self._wakeup()
+        else:
+            # Comandi: coalescenza dei movimenti nella coda della telecamera
+            with self._outbound_lock:
+                queued, superseded = self._outbound[cam_id].offer(
+                    compiled, future, self.DUPLICATE_WINDOW, retry
+                )
+            
+            if superseded is not None:
+                self._increment_stat("commands_coalesced", cam_id)
+                superseded.set_result(None)
+            if queued:
+                self._wakeup()
+            else:
+                self._increment_stat("commands_dropped", cam_id)
+                future.set_result(None)
+        
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def _transmit(self, cam_id: int, compiled: CompiledCommand, future: Future,
+                  attempt: int = 0, retry: bool = True):
+        """Assegna la sequenza, registra la richiesta e invia il datagramma"""
+        endpoint = self.endpoints[cam_id]
+        sock = self._sockets[(endpoint.host, endpoint.port)]
+        message = compiled.message
+        size = VISCA_IP_HEADER.size + len(message)
+        
+        with self._socket_lock:
+            sequence = self.sequence
+            self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+            
+            pending = PendingRequest(sequence, cam_id, compiled.is_inquiry, future,
+                                     compiled, attempt,
+                                     self.get_response_timeout(cam_id, attempt), retry)
+            
+            # Registrata PRIMA dell'invio: la risposta può arrivare subito
+            with self._pending_lock:
+                self._pending[sequence] = pending
+            
+            try:
+                VISCA_IP_HEADER.pack_into(self._packet_buffer, 0,
+                                          VISCA_IP_COMMAND, len(message), sequence)
+                self._packet_buffer[VISCA_IP_HEADER.size:size] = message
+                sock.sendto(self._packet_view[:size], (endpoint.host, endpoint.port))
+            except Exception:
+                with self._pending_lock:
+                    self._pending.pop(sequence, None)
+                raise
+        
+        self._increment_stat("commands_sent", cam_id)
+
+    def _wakeup(self):
+        """Risveglia il thread di ricezione per svuotare le code"""
+        try:
+            self._wakeup_send.send(b'\x00')
+        except (BlockingIOError, OSError):
+            pass  # Già segnalato o in chiusura
+
+    def _flush_outbound(self) -> float:
+        """
+        Invia i comandi consentiti da socket liberi e rate limit, poi le inquiry
+        
+        Returns:
+            float: Secondi prima che un altro comando in coda possa partire
+        """
+        ready = []
+        next_wait = float('inf')
+        now = time.monotonic()
+        with self._outbound_lock:
+            for cam_id, queue in self._outbound.items():
+                sockets = self._command_sockets[cam_id]
+                while sockets.available(now):
+                    item = queue.take(self.MAX_COMMANDS_PER_SEC, self.COMMAND_BURST)
+                    if item is None:
+                        break
+                    sockets.acquire()
+                    ready.append((cam_id, item))
+                next_wait = min(next_wait, max(queue.wait_time(self.MAX_COMMANDS_PER_SEC),
+                                               sockets.wait_time(now)))
+            
+            for cam_id, pipeline in self._inquiries.items():
+                while True:
+                    item = pipeline.take(self.MAX_INQUIRIES_IN_FLIGHT)
+                    if item is None:
+                        break
+                    ready.append((cam_id, item))
+        
+        for cam_id, (compiled, future, attempt, retry) in ready:
+            try:
+                self._transmit(cam_id, compiled, future, attempt, retry)
+            except Exception as e:
+                self._increment_stat("errors", cam_id)
+                self._release(cam_id, compiled.is_inquiry)
+                if not future.done():
+                    future.set_exception(e)
+        return next_wait
+
+    def _release(self, cam_id: int, is_inquiry: bool, sequence: int = -1,
+                 socket_no: Optional[int] = None):
+        """Libera il posto in volo di una richiesta (socket comandi o pipeline inquiry)"""
+        with self._outbound_lock:
+            if is_inquiry:
+                self._inquiries[cam_id].release()
+            else:
+                self._command_sockets[cam_id].release(sequence, socket_no)
+
+    def _on_request_ack(self, pending: PendingRequest):
+        """ACK: registra quale socket comandi esegue il comando"""
+        with self._outbound_lock:
+            self._command_sockets[pending.cam_id].ack(pending.socket, pending.sequence)
+
+    def _on_request_done(self, pending: PendingRequest, payload: Optional[bytes]) -> bool:
+        """
+        Libera il posto della richiesta chiusa
+        
+        Una richiesta idempotente scaduta senza risposta viene ritrasmessa
+        tenendo il posto, con timeout raddoppiato a ogni tentativo. Un comando
+        rifiutato per socket occupati (0x05) o buffer pieno (0x03) non è stato
+        eseguito: viene rimesso in coda dopo una pausa di RETRY_DELAY sui
+        socket della telecamera. In entrambi i casi al massimo MAX_RETRIES volte.
+        
+        Returns:
+            bool: True se il comando è stato ritrasmesso o ripianificato
+        """
+        if pending.command is None:
+            return False
+        
+        if payload is None and self._should_retransmit(pending):
+            try:
+                self._transmit(pending.cam_id, pending.command, pending.future,
+                               pending.attempt + 1, pending.retry)
+            except Exception as e:
+                print(f"[VISCA ERROR] Ritrasmissione: {e}")
+            else:
+                self._increment_stat("retransmissions", pending.cam_id)
+                return True
+        
+        self._release(pending.cam_id, pending.is_inquiry, pending.sequence, pending.socket)
+        
+        rejected = (payload is not None and not pending.is_inquiry and
+                    (payload[1] & 0xF0) == 0x60 and payload[2] in (0x03, 0x05))
+        if not rejected:
+            return False
+        
+        with self._outbound_lock:
+            self._command_sockets[pending.cam_id].block(self.RETRY_DELAY)
+            requeued = (pending.attempt < self.MAX_RETRIES and
+                        self._outbound[pending.cam_id].requeue(
+                            pending.command, pending.future, pending.attempt + 1,
+                            pending.retry))
+        if requeued:
+            self._increment_stat("commands_requeued", pending.cam_id)
+        return requeued
+
+    def _should_retransmit(self, pending: PendingRequest) -> bool:
+        """True se la richiesta scaduta può essere ritrasmessa"""
+        command = pending.command
+        if (not self._running or not pending.retry or pending.future.done() or
+                pending.attempt >= self.MAX_RETRIES or not command.is_idempotent):
+            return False
+        # Un movimento più recente della stessa categoria lo sostituisce
+        if command.is_movement:
+            with self._outbound_lock:
+                return command.queue_key() not in self._outbound[pending.cam_id].queued
+        return True
+
+    def _on_subscriptions_changed(self):
+        """Risveglia il thread di I/O per pianificare subito le inquiry"""
+        self._wakeup()
+
+    def _schedule_inquiries(self) -> float:
+        """
+        Accoda un'inquiry di posizione per ogni telecamera osservata con stato in scadenza
+        
+        Una sola inquiry per telecamera soddisfa tutti i sottoscrittori; non se
+        ne accoda un'altra finché la precedente è in volo.
+        
+        Returns:
+            float: Secondi alla prossima scadenza
+        """
+        stale, next_due = self._stale_cameras(time.time())
+        if not stale:
+            return next_due
+        
+        with self._outbound_lock:
+            for cam_id in stale:
+                pipeline = self._inquiries[cam_id]
+                if pipeline.in_flight or pipeline.queued:
+                    continue
+                compiled = compile_command(self.endpoints[cam_id].address, STATUS_INQUIRY)
+                # Nessuna ritrasmissione: lo scheduler la ripete alla scadenza
+                pipeline.offer(compiled, Future(), retry=False)
+        return next_due
+
+    def send_without_response(self, cam_id: int, hex_cmd: str):
+        """
+        Invia comando VISCA senza aspettare risposta (per comandi di stop)
+        
+        Args:
+            cam_id: ID telecamera (1-6)
+            hex_cmd: Comando in stringa esadecimale
+        """
+        if not self.sock:
+            return
+        
+        try:
+            self.send_async(cam_id, hex_cmd)
+        except Exception as e:
+            print(f"[VISCA ERROR] Send without response: {e}")
+
+    def _receive_loop(self):
+        """Thread di I/O: un selector su tutti i socket, risolve le richieste in attesa"""
+        print("[VISCA] Receive loop avviato")
+        
+        timeout = self.MIN_RTO / 2
+        while self._running and self._sockets:
+            try:
+                events = self._selector.select(timeout=timeout)
+            except (OSError, ValueError):
+                # Selector chiuso da close()
+                break
+            
+            for selector_key, _ in events:
+                sock = selector_key.fileobj
+                if selector_key.data is None:
+                    # Risveglio: ci sono comandi in coda
+                    try:
+                        while sock.recv(64):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                # Svuota il socket: più risposte possono essere già in coda
+                while True:
+                    try:
+                        response, _ = sock.recvfrom(1024)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        # Es. ICMP port unreachable: l'host non è raggiungibile
+                        break
+                    
+                    self._increment_stat("responses_received")
+                    try:
+                        self._dispatch_response(response, selector_key.data)
+                    except Exception as e:
+                        print(f"[VISCA DEBUG] Errore ricezione: {e}")
+            
+            next_due = self._schedule_inquiries()
+            next_wait = self._flush_outbound()
+            timeout = min(self.MIN_RTO / 2, next_wait, next_due)
+            self._expire_pending()
+        
+        print("[VISCA] Receive loop terminato")
+
     def close(self):
         """Chiudi connessione e ferma thread"""
         print("[VISCA] Chiusura controller...")
         self._running = False
         
-        if self._sync_thread and self._sync_thread.is_alive():
-            self._sync_thread.join(timeout=2.0)
+        if self._receive_thread and self._receive_thread.is_alive():
+            self._receive_thread.join(timeout=2.0)
         
-        if self.sock:
-            try:
-                self.sock.close()
-                print("[VISCA] Socket chiuso")
-            except:
-                pass
+        if self._sockets:
+            self._close_sockets()
+            print("[VISCA] Socket chiusi")
+        
+        # Sblocca chi è ancora in attesa di una risposta o in coda
+        with self._pending_lock:
+            futures = [p.future for p in self._pending.values()]
+            self._pending.clear()
+        with self._outbound_lock:
+            for queue in self._outbound.values():
+                futures.extend(item[1] for item in queue.queued.values())
+                queue.queued.clear()
+            for pipeline in self._inquiries.values():
+                futures.extend(item[1] for item in pipeline.queued.values())
+                pipeline.queued.clear()
+        for future in futures:
+            future.cancel()
         
         # Stampa statistiche finali
         stats = self.get_statistics()
-        print(f"[VISCA] Statistiche finali: {stats}")
\ No newline at end of file
+        print(f"[VISCA] Statistiche finali: {stats}")
@@ -6,6 +6,9 @@ Sostituisce visca_controller.py con un'implementazione semplificata
 from dataclasses import dataclass
 from typing import Dict
 import threading
+import time
+
+from visca_controller import CameraSnapshot
 
 
 @dataclass
@@ -19,11 +22,16 @@ class CameraState:
 class ViscaController:
     """Mock VISCA Controller - Non fa niente, solo simula lo stato"""
     
+    STATE_TIMEOUT = 3.0
+    
     def __init__(self, port: str = None, baudrate: int = 9600, timeout: float = 0.1):
         """Inizializza il controller mock"""
         self.camera_states: Dict[int, CameraState] = {
             i: CameraState() for i in range(1, 7)
         }
+        # Come il controller reale: version cresce a ogni cambio di stato
+        self._versions: Dict[int, int] = {i: 0 for i in self.camera_states}
+        self._last_update: Dict[int, float] = {i: 0.0 for i in self.camera_states}
         self.state_lock = threading.RLock()
         print("[VISCA MOCK] Controller inizializzato (nessun dispositivo reale)")
     
@@ -56,12 +64,35 @@ class ViscaController:
                 "zoom": max(1.0, min(4.0, state.zoom))
             }
     
+    def get_snapshot(self, camera_id: int) -> CameraSnapshot:
+        """Ritorna lo stato come snapshot immutabile (zoom mock in unità 1.0-4.0)"""
+        with self.state_lock:
+            state = self.camera_states[camera_id]
+            return CameraSnapshot(int(state.pan), int(state.tilt), int(state.zoom * 100),
+                                  self._last_update[camera_id], self._versions[camera_id])
+    
+    def has_changed(self, camera_id: int, version: int) -> bool:
+        """True se lo stato della telecamera è cambiato dalla versione indicata"""
+        return self._versions[camera_id] != version
+    
     def set_camera_state(self, camera_id: int, pan: float, tilt: float, zoom: float):
         """Aggiorna lo stato della telecamera"""
         with self.state_lock:
-            self.camera_states[camera_id].pan = pan
-            self.camera_states[camera_id].tilt = tilt
-            self.camera_states[camera_id].zoom = zoom
+            state = self.camera_states[camera_id]
+            if (state.pan, state.tilt, state.zoom) != (pan, tilt, zoom):
+                state.pan = pan
+                state.tilt = tilt
+                state.zoom = zoom
+                self._versions[camera_id] += 1
+            self._last_update[camera_id] = time.time()
+    
+    def subscribe(self, camera_id: int, callback=None, max_age: float = None, axes=None):
+        """Simula una sottoscrizione allo stato (nessuna inquiry)"""
+        return None
+    
+    def unsubscribe(self, subscription):
+        """Rimuove una sottoscrizione (no-op per mock)"""
+        pass
     
     def close(self):
         """Chiude la connessione (no-op per mock)"""
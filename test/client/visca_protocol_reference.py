@@ -14,6 +14,28 @@ VISCA_COMMANDS = {
     "ZOOM_STOP": "01040700FF",
 }
 
+# Pan/Tilt Drive precalcolati per (direzione pan, direzione tilt):
+# 0x01 = sinistra/su, 0x02 = destra/giù, 0x03 = stop.
+# Stringhe costanti: la cache dei comandi del controller le riconosce senza riparsarle.
+PAN_TILT_DRIVE = {
+    (p, t): f"0106010505{p:02X}{t:02X}FF"
+    for p in (0x01, 0x02, 0x03)
+    for t in (0x01, 0x02, 0x03)
+}
+
+
+def pan_tilt_drive(pan: int, tilt: int) -> str:
+    """
+    Comando Pan/Tilt Drive dal segno delle velocità
+    
+    Args:
+        pan: <0 sinistra, >0 destra, 0 stop
+        tilt: <0 su, >0 giù, 0 stop
+    """
+    pan_dir = 0x01 if pan < 0 else (0x02 if pan > 0 else 0x03)
+    tilt_dir = 0x01 if tilt < 0 else (0x02 if tilt > 0 else 0x03)
+    return PAN_TILT_DRIVE[(pan_dir, tilt_dir)]
+
 VISCA_PROTOCOL_INFO = """
 ╔════════════════════════════════════════════════════════════════╗
 ║             VISCA Protocol - Command Reference                ║
@@ -1,16 +1,22 @@
 import cv2
+import json
+import struct
 import time
 import logging
+import threading
 from threading import Lock
-from functools import lru_cache
 from flask import Flask, render_template_string, Response, request, jsonify
 import numpy as np
 from queue import Queue
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 # === IMPORTIAMO I MODULI ESISTENTI ===
 from visca_controller import ViscaController
 from visca_protocol_reference import VISCA_COMMANDS
+from frame_capture import FrameCapture
+from digital_ptz import DigitalPTZ, smooth_damp
+from stream_hub import EncodedFrame, Rendition, RenditionLadder
+from jpeg_encoder import create_jpeg_encoder, OpenCVJpegEncoder
 import config
 
 # ================= CONFIGURAZIONE =================
@@ -23,6 +29,19 @@ VIDEO_HEIGHT = 720
 OUTPUT_WIDTH = 640
 OUTPUT_HEIGHT = 480
 FPS_LIMIT = 30
+# Rendizioni MJPEG dalla più pesante alla più leggera (/video_feed?q=<nome>)
+RENDITIONS = [
+    Rendition("high", OUTPUT_WIDTH, OUTPUT_HEIGHT, 75),
+    Rendition("low", 320, 240, 60),
+]
+# Canale WebSocket: header binario dei frame (tipo, rendizione, sequenza,
+# timestamp) e intervallo di controllo dello stato da inviare
+WS_FRAME_HEADER = struct.Struct('!BBId')
+WS_MSG_FRAME = 1
+WS_STATE_INTERVAL = 0.1
+# Testi dei frame statici
+STATIC_ERROR = "Camera Error"
+STATIC_NO_SIGNAL = "No Signal"
 # ==================================================
 
 # Configurazione logging
@@ -34,6 +53,18 @@ logger = logging.getLogger('VISCA-Web')
 
 app = Flask(__name__)
 
+# WebSocket opzionale (flask-sock): senza, la UI resta su MJPEG + HTTP
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+    HAS_FLASK_SOCK = True
+except ImportError:
+    Sock = None
+    ConnectionClosed = None
+    HAS_FLASK_SOCK = False
+
+sock = Sock(app) if HAS_FLASK_SOCK else None
+
 # Connessione al Backend C#
 try:
     controller = ViscaController(TARGET_IP)
@@ -79,11 +110,12 @@ class DigitalCamState:
         self.zoom_speed = 1.5
         self.lock = Lock()  # Thread safety
         
-        # Smoothing dei movimenti
+        # Smoothing dei movimenti (smorzamento critico basato sul tempo)
         self.target_x = 0.5
         self.target_y = 0.5
         self.target_zoom = 1.0
-        self.smooth_factor = 0.15
+        self.smooth_time = 0.15  # Costante di tempo (s); lo zoom usa la metà
+        self._velocity = [0.0, 0.0, 0.0]  # x, y, zoom
         
     def update_loop(self):
         """Calcola la nuova posizione con smoothing"""
@@ -92,10 +124,11 @@ class DigitalCamState:
         self.last_update = now
         
         with self.lock:
-            # Smooth movement verso il target
-            self.x += (self.target_x - self.x) * self.smooth_factor
-            self.y += (self.target_y - self.y) * self.smooth_factor
-            self.zoom += (self.target_zoom - self.zoom) * self.smooth_factor * 2
+            # Smooth movement verso il target: stesso moto a ogni frame rate
+            v = self._velocity
+            self.x, v[0] = smooth_damp(self.x, self.target_x, v[0], self.smooth_time, dt)
+            self.y, v[1] = smooth_damp(self.y, self.target_y, v[1], self.smooth_time, dt)
+            self.zoom, v[2] = smooth_damp(self.zoom, self.target_zoom, v[2], self.smooth_time / 2, dt)
             
             # Movimento continuo basato sull'azione corrente
             if self.current_action:
@@ -127,9 +160,10 @@ class DigitalCamState:
         """Restituisce lo stato corrente per API"""
         with self.lock:
             return {
-                'x': round(self.x, 3),
-                'y': round(self.y, 3),
-                'zoom': round(self.zoom, 2),
+                # Precisione sub-pixel per il ritaglio (1e-4 ~ 0.13 px a 1280)
+                'x': round(self.x, 4),
+                'y': round(self.y, 4),
+                'zoom': round(self.zoom, 3),
                 'action': self.current_action
             }
     
@@ -192,109 +226,103 @@ KEYBOARD_MAP = {
     'Escape': 'stop'
 }
 
+# === CATTURA CONDIVISA: un solo lettore per device, per tutti i client ===
+_captures: Dict[Any, FrameCapture] = {}
+_captures_lock = Lock()
+
+def get_shared_capture(src=0) -> FrameCapture:
+    """Stadio di cattura condiviso per il device (avviato al primo uso)"""
+    with _captures_lock:
+        capture = _captures.get(src)
+        if capture is None:
+            capture = FrameCapture(src, VIDEO_WIDTH, VIDEO_HEIGHT, FPS_LIMIT,
+                                   fallback_source=None, reopen_interval=2.0)
+            capture.start()
+            _captures[src] = capture
+            logger.info(f"Camera inizializzata: {src}")
+        return capture
+
 class WebVideoStreamer:
     def __init__(self, src=0):
         self.src = src
-        self.video = None
         self.frame_queue = Queue(maxsize=2)
         self.running = True
-        self.lock = Lock()
-        self._init_camera()
-        
-    def _init_camera(self):
-        """Inizializza o re-inizializza la camera"""
-        try:
-            if self.video:
-                self.video.release()
-            
-            self.video = cv2.VideoCapture(self.src)
-            self.video.set(cv2.CAP_PROP_FRAME_WIDTH, VIDEO_WIDTH)
-            self.video.set(cv2.CAP_PROP_FRAME_HEIGHT, VIDEO_HEIGHT)
-            self.video.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-            self.video.set(cv2.CAP_PROP_FPS, FPS_LIMIT)
-            
-            logger.info(f"Camera inizializzata: {self.src}")
-            return True
-        except Exception as e:
-            logger.error(f"Errore inizializzazione camera: {e}")
-            return False
+        # Frame dal ring buffer condiviso: nessun VideoCapture per client
+        self.capture = get_shared_capture(src)
+        self._last_sequence = 0
+        # Buffer di uscita preallocati per rendizione: zoom, HUD e riduzione
+        # senza allocazioni per frame
+        self._outputs: Dict[str, np.ndarray] = {}
+        self.ptz = DigitalPTZ()
+        # Encoder scelto dal benchmark di avvio; frame statici codificati una volta
+        self.encoder = create_jpeg_encoder(sample_size=(OUTPUT_WIDTH, OUTPUT_HEIGHT))
+        self._static_frames: Dict[Tuple[str, str], bytes] = {}
     
-    @lru_cache(maxsize=32)
-    def _get_crop_coordinates(self, zoom: float, x: float, y: float, 
-                             frame_width: int, frame_height: int) -> tuple:
-        """Calcola coordinate di crop con caching per performance"""
-        new_h = int(frame_height / zoom)
-        new_w = int(frame_width / zoom)
-        
-        center_x = int(x * frame_width)
-        center_y = int(y * frame_height)
-        
-        top = max(0, center_y - new_h // 2)
-        left = max(0, center_x - new_w // 2)
-        
-        # Clamp
-        if top + new_h > frame_height:
-            top = frame_height - new_h
-        if left + new_w > frame_width:
-            left = frame_width - new_w
-            
-        return top, left, new_h, new_w
-    
-    def get_frame(self):
-        """Ottiene e processa il frame corrente"""
+    def render(self, renditions: List[Rendition]) -> Dict[str, bytes]:
+        """
+        Elabora il frame corrente e lo codifica nelle rendizioni richieste
+
+        Crop, zoom e HUD una sola volta alla risoluzione della rendizione più
+        grande; le altre sono ridotte da quella. Ogni rendizione è codificata
+        una volta per frame, qualunque sia il numero di spettatori.
+        """
         cam_state.update_loop()
         
-        with self.lock:
-            if not self.video or not self.video.isOpened():
-                if not self._init_camera():
-                    return self._get_error_frame()
-            
-            success, frame = self.video.read()
-            
-        if not success:
-            return self._get_error_frame()
-            
+        # Attende il prossimo frame del produttore (scandisce lo stream)
+        captured = self.capture.wait_newer(self._last_sequence, timeout=1.0)
+        if captured is None:
+            return {r.name: self._static_frame(STATIC_NO_SIGNAL, r) for r in renditions}
+        self._last_sequence = captured.sequence
+        
+        largest = max(renditions, key=lambda r: r.width * r.height)
         try:
-            h, w, _ = frame.shape
-            state = cam_state.get_state()
-            
-            # Ottieni coordinate di crop (cached)
-            top, left, new_h, new_w = self._get_crop_coordinates(
-                state['zoom'], state['x'], state['y'], w, h
-            )
-            
-            # Crop e resize
-            cropped = frame[top:top+new_h, left:left+new_w]
-            final = cv2.resize(cropped, (OUTPUT_WIDTH, OUTPUT_HEIGHT), 
-                             interpolation=cv2.INTER_LANCZOS4)
+            output = self._buffer(largest)
+            # Lo slot resta trattenuto solo fino al warp nel buffer di uscita
+            with captured:
+                state = cam_state.get_state()
+                
+                # Crop e scala in un solo warpAffine (geometria quantizzata in cache)
+                final = self.ptz.render(captured.image, state['zoom'], state['x'], state['y'],
+                                        out=output)
+                # Identità: il frame è condiviso, l'HUD va disegnato sul buffer di uscita
+                if final is not output:
+                    np.copyto(output, final)
             
             # HUD migliorato
-            final = self._draw_hud(final, state)
-            
-            # Compressione JPEG ottimizzata
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, 75,
-                           cv2.IMWRITE_JPEG_PROGRESSIVE, 1,
-                           cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+            self._draw_hud(output, state)
             
-            ret, jpeg = cv2.imencode('.jpg', final, encode_params)
-            
-            if not ret:
-                return self._get_error_frame()
-                
-            return jpeg.tobytes()
+            encoded = {}
+            for rendition in renditions:
+                image = output
+                if rendition is not largest:
+                    image = cv2.resize(output, (rendition.width, rendition.height),
+                                       dst=self._buffer(rendition), interpolation=cv2.INTER_AREA)
+                # JPEG baseline: progressive e optimize raddoppiano il tempo di
+                # codifica senza vantaggi per MJPEG
+                data = self.encoder.encode(image, rendition.quality)
+                encoded[rendition.name] = data or self._static_frame(STATIC_ERROR, rendition)
+            return encoded
             
         except Exception as e:
             logger.error(f"Errore processing frame: {e}")
-            return self._get_error_frame()
+            return {r.name: self._static_frame(STATIC_ERROR, r) for r in renditions}
+    
+    def _buffer(self, rendition: Rendition) -> np.ndarray:
+        """Buffer di uscita preallocato della rendizione"""
+        buffer = self._outputs.get(rendition.name)
+        if buffer is None or buffer.shape[:2] != (rendition.height, rendition.width):
+            buffer = np.empty((rendition.height, rendition.width, 3), dtype=np.uint8)
+            self._outputs[rendition.name] = buffer
+        return buffer
     
     def _draw_hud(self, frame: np.ndarray, state: Dict[str, Any]) -> np.ndarray:
         """Disegna HUD informativo sul frame"""
         h, w = frame.shape[:2]
         
-        # Sfondo semitrasparente per il testo
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (5, 5), (280, 110), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
+        # Sfondo semitrasparente per il testo: scurisce solo la regione
+        # dell'HUD, in place, senza copiare l'intero frame
+        roi = frame[5:111, 5:281]
+        cv2.addWeighted(roi, 0.4, roi, 0, 0, dst=roi)
         
         # Testo stato
         color = (0, 255, 0) if state['action'] else (200, 200, 200)
@@ -323,19 +351,29 @@ class WebVideoStreamer:
         
         return frame
     
-    def _get_error_frame(self):
-        """Genera un frame di errore"""
-        error_img = np.zeros((OUTPUT_HEIGHT, OUTPUT_WIDTH, 3), dtype=np.uint8)
-        cv2.putText(error_img, "Camera Error", (200, 240),
-                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-        ret, jpeg = cv2.imencode('.jpg', error_img)
-        return jpeg.tobytes()
+    def _static_frame(self, text: str, rendition: Rendition) -> bytes:
+        """Frame statico (errore, nessun segnale) della rendizione, codificato una sola volta"""
+        key = (text, rendition.name)
+        data = self._static_frames.get(key)
+        if data is None:
+            image = np.zeros((rendition.height, rendition.width, 3), dtype=np.uint8)
+            scale = rendition.width / OUTPUT_WIDTH
+            (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+            cv2.putText(image, text, ((rendition.width - text_w) // 2, (rendition.height + text_h) // 2),
+                       cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 255), 2)
+            try:
+                data = self.encoder.encode(image, rendition.quality)
+            except Exception as e:
+                logger.error(f"Errore codifica frame statico: {e}")
+                data = None
+            if not data:
+                data = OpenCVJpegEncoder().encode(image, rendition.quality)
+            self._static_frames[key] = data
+        return data
     
     def release(self):
-        """Rilascia le risorse"""
+        """Rilascia le risorse (la cattura condivisa resta attiva per gli altri client)"""
         self.running = False
-        if self.video:
-            self.video.release()
 
 # --- INTERFACCIA JAVASCRIPT CON SUPPORTO TASTIERA ---
 HTML_UI = """
@@ -571,7 +609,7 @@ HTML_UI = """
         ⌨️ Tastiera: WASD/Frecce | +/- Zoom | Spazio Stop | R Reset
     </div>
     
-    <img src="/video_feed" class="video-bg" id="video-feed">
+    <img class="video-bg" id="video-feed">
     
     <div class="ui-layer">
         <div class="controls-row">
@@ -596,12 +634,27 @@ HTML_UI = """
     </div>
 
     <script>
+        // Canale WebSocket (video, stato e controlli); senza, MJPEG + HTTP
+        const WS_ENABLED = {{ 'true' if ws_enabled else 'false' }};
+        const WS_HEADER_SIZE = 14;  // tipo (1), rendizione (1), sequenza (4), timestamp (8)
+        let ws = null;
+        let wsReady = false;
+        
+        // Messaggio di controllo sul WebSocket (false se il canale non è aperto)
+        const sendControl = (message) => {
+            if (!wsReady) return false;
+            ws.send(JSON.stringify(message));
+            return true;
+        };
+        
         // Gestione connessione e comandi
         const send = async (cmd) => {
             if (navigator.vibrate && !cmd.includes('stop')) {
                 navigator.vibrate(15);
             }
             
+            if (sendControl({cmd: cmd})) return true;
+            
             try {
                 const response = await fetch('/cmd/' + cmd, { 
                     method: 'POST',
@@ -816,12 +869,13 @@ HTML_UI = """
             bindButton('z-in', 'zoom_in', 'zoom_stop');
             bindButton('z-out', 'zoom_out', 'zoom_stop');
             
-            // === FUNZIONE PER SINCRONIZZARE LO STATO UI ===
-            const syncState = async () => {
-                try {
-                    const response = await fetch('/api/get-state');
-                    const data = await response.json();
-                    
+            // === FUNZIONE PER AGGIORNARE LA UI DALLO STATO ===
+            // (delta dal WebSocket o stato completo dal polling HTTP)
+            const applyState = (data) => {
+                if ('controller_connected' in data) {
+                    updateConnectionStatus(data.controller_connected);
+                }
+                if ('mode' in data) {
                     // Aggiorna UI modalità
                     document.querySelectorAll('.mode-btn').forEach((btn, idx) => {
                         if (parseInt(btn.dataset.mode) === data.mode) {
@@ -830,7 +884,8 @@ HTML_UI = """
                             btn.classList.remove('active');
                         }
                     });
-                    
+                }
+                if ('camera' in data) {
                     // Aggiorna UI telecamera
                     document.querySelectorAll('.camera-btn').forEach((btn) => {
                         if (parseInt(btn.dataset.camera) === data.camera) {
@@ -839,6 +894,14 @@ HTML_UI = """
                             btn.classList.remove('active');
                         }
                     });
+                }
+            };
+            
+            // === FUNZIONE PER SINCRONIZZARE LO STATO UI (fallback HTTP) ===
+            const syncState = async () => {
+                try {
+                    const response = await fetch('/api/get-state');
+                    applyState(await response.json());
                 } catch (err) {
                     console.error('Errore sincronizzazione stato:', err);
                 }
@@ -849,6 +912,9 @@ HTML_UI = """
                 btn.addEventListener('click', async (e) => {
                     const mode = e.target.dataset.mode;
                     
+                    // Sul WebSocket lo stato aggiornato arriva come delta
+                    if (sendControl({mode: parseInt(mode)})) return;
+                    
                     // Invia comando al server
                     try {
                         const response = await fetch(`/api/set-mode/${mode}`, {method: 'POST'});
@@ -868,6 +934,9 @@ HTML_UI = """
                 btn.addEventListener('click', async (e) => {
                     const camera = e.target.dataset.camera;
                     
+                    // Sul WebSocket lo stato aggiornato arriva come delta
+                    if (sendControl({camera: parseInt(camera)})) return;
+                    
                     // Invia comando al server
                     try {
                         const response = await fetch(`/api/set-camera/${camera}`, {method: 'POST'});
@@ -898,28 +967,93 @@ HTML_UI = """
                 }
             }, false);
             
-            // Sincronizza stato iniziale
-            syncState();
-            
-            // Connection check ogni 3 secondi
-            checkConnection();
-            setInterval(checkConnection, 3000);
+            // Rendizione dello stream: ?q=high|low|auto nell'URL della pagina
+            const videoFeed = document.getElementById('video-feed');
+            const feedQuality = new URLSearchParams(window.location.search).get('q') || 'auto';
             
-            // Sincronizza stato ogni 2 secondi
-            setInterval(syncState, 2000);
+            // === FALLBACK HTTP: MJPEG + polling dello stato ===
+            let pollTimers = [];
+            const startFallback = () => {
+                if (pollTimers.length) return;
+                videoFeed.src = '/video_feed?q=' + encodeURIComponent(feedQuality);
+                
+                // Sincronizza stato iniziale
+                syncState();
+                checkConnection();
+                
+                // Connection check ogni 3 secondi, stato ogni 2 secondi
+                pollTimers = [setInterval(checkConnection, 3000), setInterval(syncState, 2000)];
+            };
+            const stopFallback = () => {
+                pollTimers.forEach(clearInterval);
+                pollTimers = [];
+            };
             
-            // Gestione errori video
-            const videoFeed = document.getElementById('video-feed');
+            // Gestione errori video (solo MJPEG)
             videoFeed.onerror = () => {
+                if (wsReady) return;
                 setTimeout(() => {
-                    videoFeed.src = '/video_feed?' + new Date().getTime();
+                    videoFeed.src = '/video_feed?q=' + encodeURIComponent(feedQuality) +
+                                    '&t=' + new Date().getTime();
                 }, 1000);
             };
             
+            // === WEBSOCKET: frame binari e delta di stato ===
+            let frameUrl = null;
+            const showFrame = (buffer) => {
+                const view = new DataView(buffer);
+                if (buffer.byteLength <= WS_HEADER_SIZE || view.getUint8(0) !== 1) return;
+                // Latenza dal produttore, utile in console per il debug
+                videoFeed.dataset.latency = (Date.now() / 1000 - view.getFloat64(6)).toFixed(3);
+                videoFeed.dataset.sequence = view.getUint32(2);
+                
+                const url = URL.createObjectURL(
+                    new Blob([new Uint8Array(buffer, WS_HEADER_SIZE)], {type: 'image/jpeg'}));
+                const previous = frameUrl;
+                frameUrl = url;
+                videoFeed.src = url;
+                if (previous) URL.revokeObjectURL(previous);
+            };
+            
+            const connectWs = () => {
+                if (!WS_ENABLED || !window.WebSocket) {
+                    startFallback();
+                    return;
+                }
+                const proto = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+                ws = new WebSocket(proto + window.location.host + '/ws?q=' + encodeURIComponent(feedQuality));
+                ws.binaryType = 'arraybuffer';
+                ws.onopen = () => {
+                    wsReady = true;
+                    stopFallback();
+                };
+                ws.onmessage = (e) => {
+                    if (typeof e.data === 'string') {
+                        const message = JSON.parse(e.data);
+                        if (message.type === 'state') applyState(message);
+                    } else {
+                        showFrame(e.data);
+                    }
+                };
+                ws.onclose = () => {
+                    // Canale perso: torna a MJPEG + HTTP e riprova più tardi
+                    wsReady = false;
+                    ws = null;
+                    updateConnectionStatus(false);
+                    startFallback();
+                    setTimeout(connectWs, 5000);
+                };
+            };
+            connectWs();
+            
             // Cleanup
             window.addEventListener('beforeunload', () => {
                 window.removeEventListener('keydown', handleKeyDown);
                 window.removeEventListener('keyup', handleKeyUp);
+                if (ws) {
+                    ws.onclose = null;
+                    ws.close();
+                }
             });
         };
     </script>
@@ -930,30 +1064,55 @@ HTML_UI = """
 # ============= ROUTES FLASK =============
 @app.route('/')
 def index():
-    return render_template_string(HTML_UI)
+    return render_template_string(HTML_UI, ws_enabled=HAS_FLASK_SOCK)
 
-def generate_frames(streamer):
-    """Generator per lo streaming video"""
-    while True:
-        try:
-            frame = streamer.get_frame()
-            if frame:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            else:
-                time.sleep(0.05)
-        except GeneratorExit:
-            break
-        except Exception as e:
-            logger.error(f"Errore nel generator: {e}")
-            time.sleep(0.1)
+_ladders: Dict[Any, RenditionLadder] = {}
+_ladders_lock = Lock()
+
+def get_stream_ladder(src=0) -> RenditionLadder:
+    """Rendizioni MJPEG condivise della sorgente: un solo crop/zoom/encode per frame"""
+    with _ladders_lock:
+        ladder = _ladders.get(src)
+        if ladder is None:
+            ladder = RenditionLadder(WebVideoStreamer(src).render, RENDITIONS, name=f"mjpeg-{src}")
+            _ladders[src] = ladder
+        return ladder
+
+def open_frames(ladder: RenditionLadder, quality: str):
+    """Frame per uno spettatore: rendizione indicata o 'auto' (None se sconosciuta)"""
+    if quality == 'auto':
+        return ladder.adaptive_frames()
+    if quality in ladder.hubs:
+        return ladder.hub(quality).frames()
+    return None
+
+def pack_frame_message(frame: EncodedFrame, rendition: int) -> bytes:
+    """Messaggio binario WebSocket: header (tipo, rendizione, sequenza, timestamp) + JPEG"""
+    header = WS_FRAME_HEADER.pack(WS_MSG_FRAME, rendition, frame.sequence & 0xFFFFFFFF,
+                                  frame.timestamp)
+    return header + frame.data
+
+def generate_frames(frames):
+    """Generator per lo streaming video: ultimo JPEG dell'hub, al ritmo del client"""
+    try:
+        for frame in frames:
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame.data + b'\r\n')
+    finally:
+        # Client disconnesso: smette di contare come spettatore
+        frames.close()
 
 @app.route('/video_feed')
 def video_feed():
-    """Endpoint streaming video"""
-    streamer = WebVideoStreamer(0)
+    """Endpoint streaming video (?q=high|low|auto, default auto)"""
+    ladder = get_stream_ladder(0)
+    quality = request.args.get('q', 'auto')
+    frames = open_frames(ladder, quality)
+    if frames is None:
+        return jsonify({'status': 'error', 'message': f'Rendizione sconosciuta: {quality}',
+                        'renditions': list(ladder.hubs)}), 400
     return Response(
-        generate_frames(streamer),
+        generate_frames(frames),
         mimetype='multipart/x-mixed-replace; boundary=frame',
         headers={
             'Cache-Control': 'no-cache, no-store, must-revalidate',
@@ -962,23 +1121,114 @@ def video_feed():
         }
     )
 
+def run_command(action: str):
+    """Applica un comando PTZ (stato interno e simulatore C#)"""
+    # Comando speciale reset
+    if action == 'reset':
+        cam_state.reset_position()
+        logger.info("Reset posizione camera")
+        return
+    
+    # Aggiorna stato interno
+    cam_state.set_action(action)
+    
+    # Invia comando al simulatore C#
+    if controller and action in ACTION_MAP:
+        controller.send(CAMERA_ID, ACTION_MAP[action], retry=False)
+
+def get_ui_state() -> Dict[str, Any]:
+    """Stato completo mostrato dalla UI (modalità, telecamera, connessione, PTZ)"""
+    state = global_state.get_state()
+    return {
+        'mode': state['mode'],
+        'mode_name': config.MODE_NAMES[state['mode']],
+        'camera': state['camera'],
+        'controller_connected': controller is not None,
+        **cam_state.get_state()
+    }
+
+def handle_control_message(message: str):
+    """
+    Messaggio di controllo dal WebSocket (JSON compatto)
+
+    {"cmd": "up"} comando PTZ, {"mode": 2} modalità, {"camera": 3} telecamera
+    """
+    data = json.loads(message)
+    if 'cmd' in data:
+        run_command(str(data['cmd']))
+    # type() e non isinstance(): JSON true/false sono bool, sottoclasse di int
+    mode = data.get('mode')
+    if type(mode) is int and mode in (0, 1, 2):
+        global_state.set_mode(mode)
+    camera = data.get('camera')
+    if type(camera) is int and 1 <= camera <= 6:
+        global_state.set_camera(camera)
+
+if sock is not None:
+    @sock.route('/ws')
+    def ws_channel(ws):
+        """
+        Canale WebSocket del client: video e stato a valle, controlli a monte
+
+        Un thread invia i frame JPEG binari al ritmo del client (i frame
+        arrivati mentre l'invio è bloccato vengono saltati); il thread della
+        connessione riceve i controlli e ogni WS_STATE_INTERVAL secondi invia
+        solo i campi di stato cambiati.
+        """
+        ladder = get_stream_ladder(0)
+        frames = open_frames(ladder, request.args.get('q', 'auto'))
+        if frames is None:
+            frames = ladder.adaptive_frames()
+        index = {r.name: i for i, r in enumerate(ladder.renditions)}
+        send_lock = Lock()
+        closed = threading.Event()
+        
+        def pump_video():
+            try:
+                for frame in frames:
+                    if closed.is_set():
+                        break
+                    message = pack_frame_message(frame, index.get(frame.rendition, 0))
+                    with send_lock:
+                        ws.send(message)
+            except Exception:
+                pass  # Connessione chiusa
+            finally:
+                closed.set()
+                frames.close()
+        
+        video = threading.Thread(target=pump_video, name="ws-video", daemon=True)
+        video.start()
+        last_state: Dict[str, Any] = {}
+        try:
+            while not closed.is_set():
+                message = ws.receive(timeout=WS_STATE_INTERVAL)
+                if message is not None:
+                    try:
+                        handle_control_message(message)
+                    except (ValueError, TypeError, AttributeError) as e:
+                        logger.warning(f"Messaggio WebSocket non valido: {e}")
+                
+                # Delta di stato: solo i campi cambiati dall'ultimo invio
+                state = get_ui_state()
+                delta = {k: v for k, v in state.items() if k not in last_state or last_state[k] != v}
+                if delta:
+                    last_state.update(delta)
+                    with send_lock:
+                        ws.send(json.dumps({'type': 'state', **delta}))
+        except ConnectionClosed:
+            pass
+        finally:
+            closed.set()
+            video.join(timeout=2.0)
+
 @app.route('/cmd/<action>', methods=['POST'])
 def command(action):
     """Endpoint comandi PTZ"""
     try:
-        # Comando speciale reset
+        run_command(action)
         if action == 'reset':
-            cam_state.reset_position()
-            logger.info("Reset posizione camera")
             return jsonify({'status': 'ok', 'message': 'Reset eseguito'}), 200
-        
-        # Aggiorna stato interno
-        cam_state.set_action(action)
-        
-        # Invia comando al simulatore C#
-        if controller and action in ACTION_MAP:
-            controller.send(CAMERA_ID, ACTION_MAP[action], retry=False)
-        
         return jsonify({'status': 'ok', 'action': action}), 200
         
     except Exception as e:
@@ -1005,8 +1255,7 @@ def set_mode(mode):
     try:
         if mode in [0, 1, 2]:
             global_state.set_mode(mode)
-            mode_names = ['MANUAL', 'SCAN', 'TRACK']
-            return jsonify({'status': 'ok', 'mode': mode, 'mode_name': mode_names[mode]}), 200
+            return jsonify({'status': 'ok', 'mode': mode, 'mode_name': config.MODE_NAMES[mode]}), 200
         else:
             return jsonify({'status': 'error', 'message': 'Modalità non valida'}), 400
     except Exception as e:
@@ -1030,10 +1279,9 @@ def set_camera(camera):
 def get_state_api():
     """Restituisce lo stato attuale"""
     state = global_state.get_state()
-    mode_names = ['MANUAL', 'SCAN', 'TRACK']
     return jsonify({
         'mode': state['mode'],
-        'mode_name': mode_names[state['mode']],
+        'mode_name': config.MODE_NAMES[state['mode']],
         'camera': state['camera'],
         'timestamp': time.time()
     }), 200
@@ -0,0 +1,223 @@
+"""
+Web Remote ASGI - Telecomando web su server asincrono (Starlette + uvicorn)
+Stessa UI, stessi endpoint e stesso stato di web_Remote.py, ma gli stream
+MJPEG e WebSocket sono generatori asincroni alimentati dagli hub condivisi e
+cadenzati dall'arrivo dei frame: uno spettatore in attesa è una coroutine
+ferma, non un thread. I comandi verso il controller girano nel pool di
+thread, così l'event loop non si blocca mai.
+
+Avvio: python web_remote_asgi.py  (oppure: uvicorn web_remote_asgi:app)
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict
+
+from jinja2 import Template
+
+import config
+from web_Remote import (
+    HTML_UI, KEYBOARD_MAP, WS_STATE_INTERVAL, logger, controller, global_state, cam_state,
+    get_stream_ladder, run_command, get_ui_state, handle_control_message, pack_frame_message
+)
+
+# Starlette è opzionale: senza, resta disponibile solo il server Flask
+try:
+    from starlette.applications import Starlette
+    from starlette.responses import HTMLResponse, JSONResponse, StreamingResponse
+    from starlette.routing import Route, WebSocketRoute
+    from starlette.websockets import WebSocketDisconnect
+    HAS_STARLETTE = True
+except ImportError:
+    Starlette = None
+    HAS_STARLETTE = False
+
+# Pagina renderizzata una volta sola: nel server ASGI il WebSocket c'è sempre
+_PAGE = Template(HTML_UI).render(ws_enabled=True)
+
+_STREAM_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate',
+    'Pragma': 'no-cache',
+    'Expires': '0'
+}
+
+
+def open_aframes(quality: str):
+    """Frame asincroni per uno spettatore: rendizione indicata o 'auto' (None se sconosciuta)"""
+    ladder = get_stream_ladder(0)
+    if quality == 'auto':
+        return ladder.adaptive_aframes()
+    if quality in ladder.hubs:
+        return ladder.hub(quality).aframes()
+    return None
+
+
+async def generate_frames(frames):
+    """Generatore asincrono MJPEG: ultimo JPEG dell'hub, al ritmo del client"""
+    try:
+        async for frame in frames:
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame.data + b'\r\n')
+    finally:
+        # Client disconnesso: smette di contare come spettatore
+        await frames.aclose()
+
+
+# ============= ROUTES ASGI =============
+async def index(request):
+    return HTMLResponse(_PAGE)
+
+
+async def video_feed(request):
+    """Endpoint streaming video (?q=high|low|auto, default auto)"""
+    quality = request.query_params.get('q', 'auto')
+    frames = open_aframes(quality)
+    if frames is None:
+        return JSONResponse({'status': 'error', 'message': f'Rendizione sconosciuta: {quality}',
+                             'renditions': list(get_stream_ladder(0).hubs)}, status_code=400)
+    return StreamingResponse(generate_frames(frames),
+                             media_type='multipart/x-mixed-replace; boundary=frame',
+                             headers=_STREAM_HEADERS)
+
+
+async def ws_channel(websocket):
+    """
+    Canale WebSocket del client (stesso protocollo di web_Remote.py)
+
+    Un task invia i frame binari al ritmo del client; il task della
+    connessione riceve i controlli e ogni WS_STATE_INTERVAL secondi invia
+    solo i campi di stato cambiati.
+    """
+    await websocket.accept()
+    ladder = get_stream_ladder(0)
+    frames = open_aframes(websocket.query_params.get('q', 'auto')) or ladder.adaptive_aframes()
+    index = {r.name: i for i, r in enumerate(ladder.renditions)}
+
+    async def pump_video():
+        try:
+            async for frame in frames:
+                await websocket.send_bytes(pack_frame_message(frame, index.get(frame.rendition, 0)))
+        finally:
+            await frames.aclose()
+
+    video = asyncio.create_task(pump_video())
+    last_state: Dict[str, Any] = {}
+    try:
+        while not video.done():
+            try:
+                event = await asyncio.wait_for(websocket.receive(), WS_STATE_INTERVAL)
+            except (asyncio.TimeoutError, TimeoutError):
+                event = {}
+            if event.get('type') == 'websocket.disconnect':
+                break
+            # I controlli sono solo testo: i messaggi binari vengono ignorati
+            message = event.get('text')
+            if message is not None:
+                try:
+                    await asyncio.to_thread(handle_control_message, message)
+                except (ValueError, TypeError, AttributeError) as e:
+                    logger.warning(f"Messaggio WebSocket non valido: {e}")
+
+            # Delta di stato: solo i campi cambiati dall'ultimo invio
+            state = get_ui_state()
+            delta = {k: v for k, v in state.items() if k not in last_state or last_state[k] != v}
+            if delta:
+                last_state.update(delta)
+                await websocket.send_text(json.dumps({'type': 'state', **delta}))
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # Connessione chiusa
+    finally:
+        video.cancel()
+        try:
+            await video
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+async def command(request):
+    """Endpoint comandi PTZ (il controller gira fuori dall'event loop)"""
+    action = request.path_params['action']
+    try:
+        await asyncio.to_thread(run_command, action)
+        if action == 'reset':
+            return JSONResponse({'status': 'ok', 'message': 'Reset eseguito'})
+        return JSONResponse({'status': 'ok', 'action': action})
+    except Exception as e:
+        logger.error(f"Errore comando {action}: {e}")
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+
+async def api_status(request):
+    """Endpoint API per lo stato"""
+    return JSONResponse({
+        'controller_connected': controller is not None,
+        'camera_state': cam_state.get_state(),
+        'timestamp': time.time()
+    })
+
+
+async def keyboard_map(request):
+    """Endpoint per ottenere il mapping tastiera"""
+    return JSONResponse(KEYBOARD_MAP)
+
+
+async def set_mode(request):
+    """Cambia la modalità della telecamera (0=Manual, 1=Scan, 2=Track)"""
+    mode = request.path_params['mode']
+    if mode in [0, 1, 2]:
+        global_state.set_mode(mode)
+        return JSONResponse({'status': 'ok', 'mode': mode, 'mode_name': config.MODE_NAMES[mode]})
+    return JSONResponse({'status': 'error', 'message': 'Modalità non valida'}, status_code=400)
+
+
+async def set_camera(request):
+    """Cambia la telecamera attiva (1-6)"""
+    camera = request.path_params['camera']
+    if 1 <= camera <= 6:
+        global_state.set_camera(camera)
+        return JSONResponse({'status': 'ok', 'camera': camera})
+    return JSONResponse({'status': 'error', 'message': 'Telecamera non valida'}, status_code=400)
+
+
+async def get_state_api(request):
+    """Restituisce lo stato attuale"""
+    state = global_state.get_state()
+    return JSONResponse({
+        'mode': state['mode'],
+        'mode_name': config.MODE_NAMES[state['mode']],
+        'camera': state['camera'],
+        'timestamp': time.time()
+    })
+
+
+def create_app() -> 'Starlette':
+    """Applicazione ASGI del telecomando web"""
+    if not HAS_STARLETTE:
+        raise RuntimeError("Starlette non installato: pip install starlette uvicorn")
+    return Starlette(routes=[
+        Route('/', index),
+        Route('/video_feed', video_feed),
+        WebSocketRoute('/ws', ws_channel),
+        Route('/cmd/{action}', command, methods=['POST']),
+        Route('/api/status', api_status),
+        Route('/api/keyboard-map', keyboard_map),
+        Route('/api/set-mode/{mode:int}', set_mode, methods=['POST']),
+        Route('/api/set-camera/{camera:int}', set_camera, methods=['POST']),
+        Route('/api/get-state', get_state_api),
+    ])
+
+
+app = create_app() if HAS_STARLETTE else None
+
+if __name__ == '__main__':
+    logger.info("=== AVVIO WEB REMOTE (ASGI) ===")
+    try:
+        import uvicorn
+    except ImportError:
+        uvicorn = None
+        logger.error("uvicorn non installato: pip install uvicorn")
+    if app is None:
+        logger.error("Starlette non installato: pip install starlette")
+    elif uvicorn is not None:
+        uvicorn.run(app, host='0.0.0.0', port=5000, log_level='info')